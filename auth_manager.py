@@ -1,53 +1,31 @@
-import ujson
 import hashlib
-import os
 import ubinascii
-
-AUTH_FILE = "auth.json"
-SERIAL_FILE = "serial.txt"
+import config_store
 
 def hash_password(password):
     return ubinascii.hexlify(hashlib.sha256(password.encode()).digest()).decode()
 
-def file_exists(path):
-    try:
-        os.stat(path)
-        return True
-    except OSError:
-        return False
-
 def is_setup():
-    return file_exists(AUTH_FILE)
+    return config_store.get("auth") is not None
 
 def set_password(password):
     p_hash = hash_password(password)
-    with open(AUTH_FILE, "w") as f:
-        ujson.dump({"hash": p_hash}, f)
+    config_store.put("auth", {"hash": p_hash}, flush=True)
     print("Password set.")
 
 def verify_password(password):
-    if not is_setup(): return False
-    try:
-        with open(AUTH_FILE, "r") as f:
-            data = ujson.load(f)
-        return hash_password(password) == data.get("hash")
-    except:
-        return False
+    data = config_store.get("auth")
+    if not data or not password: return False
+    return hash_password(password) == data.get("hash")
 
 def get_serial():
-    try:
-        with open(SERIAL_FILE, "r") as f:
-            return f.read().strip()
-    except:
-        return "UNKNOWN"
+    return config_store.get("serial") or "UNKNOWN"
 
 def factory_reset(serial_input):
-    # If serial matches, delete auth.json and wifi.json
+    # If serial matches, forget the password and WiFi settings
     real_serial = get_serial()
     if serial_input == real_serial:
-        try: os.remove(AUTH_FILE)
-        except: pass
-        try: os.remove("wifi.json")
-        except: pass
+        config_store.delete("auth")
+        config_store.delete("wifi")
         return True
     return False
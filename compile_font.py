@@ -1,6 +1,7 @@
 import os
 import glob
 import re
+import struct
 from PIL import Image, ImageFont, ImageDraw
 
 # Configuration
@@ -78,6 +79,8 @@ def render_char_bitmap(font, char):
         
     return buffer
 def generate_font_file(chars):
+    # Codepoints are stored as uint16, so only BMP characters fit
+    chars = [c for c in chars if ord(c) <= 0xFFFF]
     print(f"Generating font_zh.py and font_data.bin with {len(chars)} characters")
     
     try:
@@ -86,57 +89,188 @@ def generate_font_file(chars):
         print(f"Error: Could not load font at {FONT_PATH}")
         return
 
-    # 1. Generate Binary Data and Index
-    index = {}
+    # 1. Generate Binary Data
+    # Layout: count (uint16 LE), sorted codepoints (uint16 LE each), then
+    # one 32-byte glyph per codepoint in the same order.
+    codes = sorted(ord(c) for c in chars)
     with open("font_data.bin", "wb") as bin_file:
-        offset = 0
-        for char in chars:
-            bitmap = render_char_bitmap(font, char)
-            bin_file.write(bitmap)
-            index[char] = offset
-            offset += 32 # 16x16 = 256 bits = 32 bytes
+        bin_file.write(struct.pack("<H", len(codes)))
+        bin_file.write(struct.pack(f"<{len(codes)}H", *codes))
+        for code in codes:
+            bin_file.write(render_char_bitmap(font, chr(code)))
 
     # 2. Generate Python Driver
     with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        f.write("# Auto-generated by compile_font.py (File-Backed)\n")
+        f.write("# Auto-generated by compile_font.py (File-Backed, Cached)\n")
         f.write("import framebuf\n\n")
         
-        # Write the Index
-        f.write("INDEX = {\n")
-        for char, off in index.items():
-            f.write(f'    "{char}": {off},\n')
-        f.write("}\n\n")
-        
-        # Add the draw functions
-        f.write("""def draw_char(fb, char, x, y):
-    if char not in INDEX: return
-    offset = INDEX[char]
-    
-    # Read from file (Lazy Load)
-    try:
-        with open('font_data.bin', 'rb') as f:
-            f.seek(offset)
-            data = f.read(32)
-    except OSError:
-        return
+        # Add the index loader, glyph cache and draw functions
+        f.write("""GLYPH_BYTES = 32
+
+_file = None
+
+def _open():
+    # One long-lived handle instead of an open() per glyph
+    global _file
+    if _file is None:
+        try:
+            _file = open('font_data.bin', 'rb')
+        except OSError:
+            return None
+    return _file
+
+# Sorted uint16 codepoints from the font_data.bin header
+COUNT = 0
+_codes = b''
+_data_start = 0
+
+def _load_index():
+    global COUNT, _codes, _data_start
+    f = _open()
+    if f is None: return
+    head = f.read(2)
+    if len(head) != 2: return
+    count = head[0] | (head[1] << 8)
+    codes = bytearray(2 * count)
+    if f.readinto(codes) != len(codes): return
+    COUNT = count
+    _codes = codes
+    _data_start = 2 + 2 * count
+
+_load_index()
+
+def find(cp):
+    # Binary search; returns the glyph number or -1
+    lo = 0
+    hi = COUNT - 1
+    codes = _codes
+    while lo <= hi:
+        mid = (lo + hi) >> 1
+        val = codes[2 * mid] | (codes[2 * mid + 1] << 8)
+        if val < cp:
+            lo = mid + 1
+        elif val > cp:
+            hi = mid - 1
+        else:
+            return mid
+    return -1
+
+# Glyph cache: the most recently drawn glyphs stay in RAM, each slot
+# with its own FrameBuffer built once at import.
+CACHE_SIZE = 32
+
+_pool = bytearray(CACHE_SIZE * GLYPH_BYTES)
+_mv = memoryview(_pool)
+_fbs = [framebuf.FrameBuffer(_mv[i * GLYPH_BYTES:(i + 1) * GLYPH_BYTES], 16, 16, framebuf.MONO_HLSB)
+        for i in range(CACHE_SIZE)]
+_slot_of = {}
+_owner = [None] * CACHE_SIZE
+_stamp = [0] * CACHE_SIZE
+_clock = 0
+
+hits = 0
+misses = 0
 
-    char_fb = framebuf.FrameBuffer(bytearray(data), 16, 16, framebuf.MONO_HLSB)
-    fb.blit(char_fb, x, y)
+def _load(char):
+    global _clock, hits, misses
+    _clock += 1
+    slot = _slot_of.get(char)
+    if slot is not None:
+        hits += 1
+        _stamp[slot] = _clock
+        return _fbs[slot]
+
+    n = find(ord(char))
+    if n < 0: return None
+    f = _open()
+    if f is None: return None
+    misses += 1
+
+    # Evict the least recently used slot
+    slot = 0
+    oldest = _stamp[0]
+    for i in range(1, CACHE_SIZE):
+        if _stamp[i] < oldest:
+            oldest = _stamp[i]
+            slot = i
+    old = _owner[slot]
+    if old is not None:
+        del _slot_of[old]
+        _owner[slot] = None
+        _stamp[slot] = 0
+
+    f.seek(_data_start + n * GLYPH_BYTES)
+    start = slot * GLYPH_BYTES
+    if f.readinto(_mv[start:start + GLYPH_BYTES]) != GLYPH_BYTES:
+        return None
+    _slot_of[char] = slot
+    _owner[slot] = char
+    _stamp[slot] = _clock
+    return _fbs[slot]
+
+def cache_stats():
+    return {"hits": hits, "misses": misses, "cached": len(_slot_of), "size": CACHE_SIZE}
+
+def draw_char(fb, char, x, y):
+    glyph = _load(char)
+    if glyph is None: return
+    fb.blit(glyph, x, y)
 
 def draw_text(fb, text, x, y):
     cursor = x
     for char in text:
-        if char in INDEX:
-            draw_char(fb, char, cursor, y)
-            cursor += 16
-        elif 32 <= ord(char) <= 126:
+        cp = ord(char)
+        if 32 <= cp <= 126:
             fb.text(char, cursor, y + 4, 0)
             cursor += 8
+            continue
+        glyph = _load(char)
+        if glyph is not None:
+            fb.blit(glyph, cursor, y)
+            cursor += 16
         else:
             fb.text("?", cursor, y + 4, 0)
             cursor += 8
 """)
 
+    report_footprint(len(codes))
+
+def report_footprint(count):
+    """Imports the generated module on the host and prints its cost."""
+    import importlib
+    import sys
+    import time
+    import tracemalloc
+    import types
+
+    src_size = os.path.getsize(OUTPUT_FILE)
+    print(f"font_zh.py: {src_size} bytes of source, index {2 + 2 * count} bytes resident")
+
+    # framebuf only exists on the device; a placeholder is enough to import
+    if "framebuf" not in sys.modules:
+        try:
+            import framebuf  # noqa: F401
+        except ImportError:
+            sys.modules["framebuf"] = types.SimpleNamespace(
+                MONO_HLSB=0, FrameBuffer=lambda *args: None)
+
+    # Don't leave a __pycache__ behind in the build directory
+    sys.dont_write_bytecode = True
+    sys.path.insert(0, os.getcwd())
+    sys.modules.pop("font_zh", None)
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    mod = importlib.import_module("font_zh")
+    elapsed = (time.perf_counter() - t0) * 1000
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    if mod._file:
+        mod._file.close()
+    sys.modules.pop("font_zh", None)
+    sys.path.pop(0)
+    print(f"font_zh import (host): {elapsed:.2f} ms, "
+          f"{retained / 1024:.1f} KB retained ({peak / 1024:.1f} KB peak incl. compile)")
+
 if __name__ == "__main__":
     chars = get_chinese_chars()
     if chars:
@@ -0,0 +1,95 @@
+import os
+import ujson
+import uasyncio
+
+# Every settings file, loaded once at boot and served from RAM. put()
+# marks a file dirty; dirty files are written together FLUSH_DELAY_MS after
+# the first change, so a burst of slider moves costs one flash write.
+FILES = {
+    "wifi": "wifi.json",
+    "led": "led_config.json",
+    "auth": "auth.json",
+    "serial": "serial.txt", # Plain text, written by tools/factory_setup.py
+}
+FLUSH_DELAY_MS = 2000
+
+_values = {} # name -> parsed contents, None if the file is absent
+_dirty = set()
+_flush_pending = False
+
+def _is_text(name):
+    return not FILES[name].endswith(".json")
+
+def _read(name):
+    try:
+        with open(FILES[name], "r") as f:
+            if _is_text(name):
+                return f.read().strip()
+            return ujson.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _write(name):
+    path = FILES[name]
+    value = _values.get(name)
+    if value is None:
+        try: os.remove(path)
+        except OSError: pass
+        return
+    # Write a temp file and rename it over the old one, so a reset mid-write
+    # leaves either the old or the new contents
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        if _is_text(name):
+            f.write(value)
+        else:
+            ujson.dump(value, f)
+    try:
+        os.rename(tmp, path)
+    except OSError:
+        # FAT will not rename onto an existing file
+        os.remove(path)
+        os.rename(tmp, path)
+
+def load_all():
+    for name in FILES:
+        _values[name] = _read(name)
+    _dirty.clear()
+
+def get(name):
+    return _values.get(name)
+
+def put(name, value, flush=False):
+    # flush=True writes before returning, for settings a reboot follows
+    _values[name] = value
+    _dirty.add(name)
+    if flush:
+        flush_now()
+    else:
+        _schedule()
+
+def delete(name, flush=True):
+    put(name, None, flush)
+
+def flush_now():
+    for name in list(_dirty):
+        _dirty.discard(name)
+        try:
+            _write(name)
+        except OSError as e:
+            print(f"Config Write Error {FILES[name]}: {e}")
+
+def _schedule():
+    global _flush_pending
+    if _flush_pending:
+        return
+    _flush_pending = True
+    uasyncio.create_task(_flush_later())
+
+async def _flush_later():
+    global _flush_pending
+    await uasyncio.sleep_ms(FLUSH_DELAY_MS)
+    _flush_pending = False
+    flush_now()
+
+load_all()
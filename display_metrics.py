@@ -0,0 +1,53 @@
+from array import array
+
+# Recent frame timings, kept separately for partial and full refreshes.
+# Each frame is 4 values in microseconds: draw, spi, busy, total.
+RING_SIZE = 16
+FIELDS = ("draw_us", "spi_us", "busy_us", "total_us")
+
+class Ring:
+    def __init__(self, size=RING_SIZE):
+        self.size = size
+        self.data = array('I', [0] * (size * len(FIELDS)))
+        self.head = 0 # Next slot to write
+        self.count = 0
+        self.frames = 0 # Total recorded since boot
+
+    def add(self, draw_us, spi_us, busy_us, total_us):
+        i = self.head * 4
+        data = self.data
+        data[i] = draw_us
+        data[i + 1] = spi_us
+        data[i + 2] = busy_us
+        data[i + 3] = total_us
+        self.head = (self.head + 1) % self.size
+        if self.count < self.size:
+            self.count += 1
+        self.frames += 1
+
+    def snapshot(self):
+        # Oldest first, plus per-field averages
+        frames = []
+        sums = [0, 0, 0, 0]
+        start = (self.head - self.count) % self.size
+        for n in range(self.count):
+            i = ((start + n) % self.size) * 4
+            frame = {}
+            for f in range(4):
+                frame[FIELDS[f]] = self.data[i + f]
+                sums[f] += self.data[i + f]
+            frames.append(frame)
+        avg = {}
+        for f in range(4):
+            avg[FIELDS[f]] = sums[f] // self.count if self.count else 0
+        return {"count": self.frames, "avg": avg, "recent": frames}
+
+partial = Ring()
+full = Ring()
+
+def record(is_partial, draw_us, spi_us, busy_us, total_us):
+    ring = partial if is_partial else full
+    ring.add(draw_us, spi_us, busy_us, total_us)
+
+def snapshot():
+    return {"partial": partial.snapshot(), "full": full.snapshot()}
@@ -3,6 +3,27 @@ import weather_api
 import font_zh
 import wifi_manager
 import gc
+import time
+import frame_pool
+import display_metrics
+import image_store
+
+ROW_BYTES = 128 // 8
+HEIGHT = 296
+
+# Changed row bands closer than this are merged into one window
+DIRTY_GAP = 8
+
+REFRESH_FULL = 1
+REFRESH_PARTIAL = 2
+
+# OTP partial refresh passes per update (more passes, better contrast)
+PARTIAL_PASSES = 3
+
+# Bands sent with the last frame, None for the whole frame. The IL3820
+# swaps its two RAM banks on every refresh, so they are written again
+# afterwards to keep both banks equal to the front buffer.
+_sent_bands = None
 
 # 5x7 bit patterns for numbers 0-9 and :
 BIG_DIGITS = {
@@ -20,18 +41,36 @@ BIG_DIGITS = {
     ' ': (0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00),
 }
 
-def draw_big_char(fb, char, x, y, scale=3):
-    if char not in BIG_DIGITS: return
-    pattern = BIG_DIGITS[char]
-    for row_idx, row_val in enumerate(pattern):
-        for col_idx in range(5): 
-            if (row_val >> (4 - col_idx)) & 1:
-                fb.fill_rect(x + col_idx * scale, y + row_idx * scale, scale, scale, 0x00)
+# Scaled BIG_DIGITS rendered once per scale: {scale: {char: FrameBuffer}}
+_sprites = {}
+
+def build_sprites(scale):
+    w = 5 * scale
+    h = 7 * scale
+    sprites = {}
+    for char, pattern in BIG_DIGITS.items():
+        sprite = framebuf.FrameBuffer(bytearray(((w + 7) // 8) * h), w, h, framebuf.MONO_HLSB)
+        sprite.fill(1) # White, used as the transparent key when blitting
+        for row_idx, row_val in enumerate(pattern):
+            for col_idx in range(5):
+                if (row_val >> (4 - col_idx)) & 1:
+                    sprite.fill_rect(col_idx * scale, row_idx * scale, scale, scale, 0x00)
+        sprites[char] = sprite
+    _sprites[scale] = sprites
+    return sprites
+
+def draw_big_char(fb, char, x, y, scale=3, sprites=None):
+    if sprites is None:
+        sprites = _sprites.get(scale) or build_sprites(scale)
+    sprite = sprites.get(char)
+    if sprite is None: return
+    fb.blit(sprite, x, y, 1)
 
 def draw_big_text(fb, text, x, y, scale=3):
+    sprites = _sprites.get(scale) or build_sprites(scale)
     cursor_x = x
     for char in text:
-        draw_big_char(fb, char, cursor_x, y, scale)
+        draw_big_char(fb, char, cursor_x, y, scale, sprites)
         cursor_x += (6 * scale) 
 
 def draw_header(fb, date_str, time_str):
@@ -100,36 +139,94 @@ def draw_message(fb, message):
         font_zh.draw_text(fb, word, x, y)
         x += (len(word) * 16) + 8 
 
-def draw_image(epd, buf):
+def find_dirty_bands(new, old):
+    # Returns row bands (y_start, y_end), ends inclusive, covering every
+    # row that differs. Bands are sent full width: one contiguous write
+    # each, where byte-aligned windows would need a slice per row.
+    bands = []
+    y_start = -1
+    y_end = -1
+    for y in range(HEIGHT):
+        row = y * ROW_BYTES
+        # Compared in place, never sliced: no allocation per row
+        x = 0
+        while x < ROW_BYTES and new[row + x] == old[row + x]:
+            x += 1
+        if x == ROW_BYTES:
+            continue
+        if y_start >= 0 and y - y_end <= DIRTY_GAP:
+            y_end = y
+        else:
+            if y_start >= 0: bands.append((y_start, y_end))
+            y_start = y_end = y
+    if y_start >= 0: bands.append((y_start, y_end))
+    return bands
+
+def send_frame(epd, buf, partial):
+    # Full refreshes always push the whole frame; partial ones only the diff
+    # against the front buffer, which mirrors panel RAM
+    global _sent_bands
+    last = frame_pool.front()
+    if not partial or last is None:
+        _sent_bands = None
+        epd.set_frame_memory(buf)
+        return True
+    bands = find_dirty_bands(buf, last)
+    if not bands:
+        return False
+    _sent_bands = bands
+    for y0, y1 in bands:
+        epd.set_frame_rows(buf, y0, y1)
+    return True
+
+def mirror_frame(epd):
+    # After a refresh: write what was just shown into the other RAM bank,
+    # which still holds the frame before it
+    buf = frame_pool.front()
+    if buf is None:
+        return
     try:
-        with open('image.bin', 'rb') as f:
-            f.readinto(buf)
+        if _sent_bands is None:
+            epd.set_frame_memory(buf)
+        else:
+            for y0, y1 in _sent_bands:
+                epd.set_frame_rows(buf, y0, y1)
+    except Exception:
+        frame_pool.invalidate()
+        raise
+
+def draw_image(epd, buf, slot=image_store.DEFAULT_SLOT):
+    global _sent_bands
+    _sent_bands = None
+    try:
+        if not image_store.load_into(slot, buf):
+            print(f"Load Image Error: no slot '{slot}'")
+            return False
         # Direct render, skip other drawing
-        epd._command(0x4E, bytearray([0x00]))
-        epd._command(0x4F, bytearray([0x00, 0x00]))
         epd.set_frame_memory(buf)
-        epd.display_frame()
         return True
     except Exception as e:
         print(f"Load Image Error: {e}")
         return False
 
-def draw_screen(epd, time_str, date_str, message="", partial=False):
+def render_screen(epd, time_str, date_str, message="", partial=False):
+    # Draws the frame and sends it to panel RAM. Returns the refresh to run:
+    # REFRESH_FULL, REFRESH_PARTIAL, or None when there is nothing to show.
     print(f"Drawing: {time_str} Msg: {message} Partial: {partial}")
     
-    # 1. Clear RAM for the big buffer
-    gc.collect()
-    
+    # Back buffer from the boot-time pool (128 * 296 / 8 = 4736 bytes)
+    buf, fb = frame_pool.borrow()
+    sent = False
     try:
-        # Create a buffer (128 * 296 / 8 = 4736 bytes)
-        buf = bytearray(128 * 296 // 8)
-        fb = framebuf.FrameBuffer(buf, 128, 296, framebuf.MONO_HLSB)
-        
         # --- IMAGE MODE ---
-        if message == "__IMAGE__":
-            if draw_image(epd, buf):
-                return
+        slot = image_store.slot_from_message(message)
+        if slot is not None:
+            if draw_image(epd, buf, slot):
+                sent = True
+                return REFRESH_FULL
             else:
+                # Part of the image may be in panel RAM now; send in full
+                frame_pool.invalidate()
                 message = "Image Error" # Fallback
 
         # --- NORMAL MODE ---
@@ -144,24 +241,59 @@ def draw_screen(epd, time_str, date_str, message="", partial=False):
             
         draw_footer(fb)
 
-        # Send to Display
-        epd._command(0x4E, bytearray([0x00]))
-        epd._command(0x4F, bytearray([0x00, 0x00]))
-        
-        epd.set_frame_memory(buf)
-        
-        if partial:
-            # Run OTP Partial twice to improve contrast
-            epd.display_frame_otp_partial()
-            epd.display_frame_otp_partial()
-            epd.display_frame_otp_partial()
-        else:
-            epd.display_frame()
+        # Send to Display (only the changed windows on partial updates)
+        try:
+            changed = send_frame(epd, buf, partial)
+        except Exception:
+            # Panel RAM may hold part of this frame, so the front buffer no
+            # longer mirrors it; the next frame goes out in full
+            frame_pool.invalidate()
+            raise
+        if not changed:
+            print("Display: no change")
+            return None
+        sent = True
+        return REFRESH_PARTIAL if partial else REFRESH_FULL
         
     except MemoryError:
         print("Display Error: Out of RAM!")
+        return None
     finally:
-        # Clean up aggressively
-        if 'fb' in locals(): del fb
-        if 'buf' in locals(): del buf
-        gc.collect()
\ No newline at end of file
+        frame_pool.release(sent)
+
+def _record(epd, refresh, t0, t_sent):
+    if refresh is None: return
+    now = time.ticks_us()
+    draw_us = max(0, time.ticks_diff(t_sent, t0) - epd.spi_us)
+    display_metrics.record(refresh == REFRESH_PARTIAL, draw_us, epd.spi_us,
+                           epd.busy_us, time.ticks_diff(now, t0))
+
+def draw_screen(epd, time_str, date_str, message="", partial=False):
+    t0 = time.ticks_us()
+    epd.reset_timing()
+    refresh = render_screen(epd, time_str, date_str, message, partial)
+    t_sent = time.ticks_us()
+    if refresh == REFRESH_PARTIAL:
+        # Repeat OTP Partial to improve contrast
+        for _ in range(PARTIAL_PASSES):
+            epd.display_frame_otp_partial()
+    elif refresh == REFRESH_FULL:
+        epd.display_frame()
+    if refresh is not None:
+        mirror_frame(epd)
+    _record(epd, refresh, t0, t_sent)
+
+async def draw_screen_async(epd, time_str, date_str, message="", partial=False):
+    # Same as draw_screen, but the panel busy time is spent in the event loop
+    t0 = time.ticks_us()
+    epd.reset_timing()
+    refresh = render_screen(epd, time_str, date_str, message, partial)
+    t_sent = time.ticks_us()
+    if refresh == REFRESH_PARTIAL:
+        for _ in range(PARTIAL_PASSES):
+            await epd.display_frame_otp_partial_async()
+    elif refresh == REFRESH_FULL:
+        await epd.display_frame_async()
+    if refresh is not None:
+        mirror_frame(epd)
+    _record(epd, refresh, t0, t_sent)
@@ -1,51 +1,123 @@
 import usocket
 import uasyncio
+import time
+
+# Captive-portal DNS: every A query is answered with the AP's own address.
+# The task sleeps on the socket in the uasyncio I/O queue (poll) and only
+# wakes when a packet arrives, then drains everything that is pending.
+# Answers are assembled in one preallocated buffer from a template built
+# once in __init__.
+#
+# Other query types get NODATA (NOERROR without answers), so phones stop
+# retrying AAAA lookups, and reverse (.arpa) lookups get NXDOMAIN.
+TTL = 60
+RATE_LIMIT = 20 # Queries per client per second; more are dropped (0: off)
+MAX_CLIENTS = 16
+POLL_MS = 20 # Only used where the uasyncio I/O queue is not available
+
+_TYPE_A = 1
+_TYPE_ANY = 255
+_CLASS_IN = 1
+_ARPA = b"\x04arpa\x00"
+
+try:
+    from uasyncio import core
+    _io_queue = core._io_queue
+except (ImportError, AttributeError):
+    _io_queue = None # Host / older uasyncio: sleep-polling fallback
+
+def _readable(sock):
+    # Awaitable: parks the task until sock has data
+    yield _io_queue.queue_read(sock)  # type: ignore
 
 class DNSServer:
-    def __init__(self, ip):
+    def __init__(self, ip, port=53):
         self.ip = ip
+        self.port = port
         self.sock = usocket.socket(usocket.AF_INET, usocket.SOCK_DGRAM)
         self.sock.setblocking(False)
-        self.sock.bind(('', 53))
+        self.sock.bind(('', port))
+        # Name (pointer to the question), TYPE A, CLASS IN, TTL, RDLENGTH 4, IP
+        self._answer = (b'\xc0\x0c\x00\x01\x00\x01' + TTL.to_bytes(4, 'big')
+                        + b'\x00\x04' + bytes(map(int, ip.split('.'))))
+        self._buf = bytearray(512)
+        self._window = time.ticks_ms()  # type: ignore
+        self._counts = {} # Client address -> queries in the current window
+        self.answered = 0
+        self.dropped = 0
+
+    def _allow(self, host):
+        if not RATE_LIMIT:
+            return True
+        now = time.ticks_ms()  # type: ignore
+        if time.ticks_diff(now, self._window) >= 1000:  # type: ignore
+            self._window = now
+            self._counts.clear()
+        n = self._counts.get(host, 0)
+        if n >= RATE_LIMIT:
+            return False
+        if not n and len(self._counts) >= MAX_CLIENTS:
+            return False
+        self._counts[host] = n + 1
+        return True
+
+    def respond(self, data):
+        # Returns the length of the answer built in self._buf, or 0 to drop
+        n = len(data)
+        # Queries only (QR clear, standard opcode) with at least one question
+        if n < 17 or data[2] & 0xF8 or not (data[4] or data[5]):
+            return 0
+        idx = 12
+        while idx < n and data[idx]:
+            if data[idx] & 0xC0:
+                return 0 # No compression in a question
+            idx += data[idx] + 1
+        end = idx + 5 # Zero byte, QTYPE, QCLASS
+        if end > n or end + len(self._answer) > len(self._buf):
+            return 0
+        qtype = (data[idx + 1] << 8) | data[idx + 2]
+        qclass = (data[idx + 3] << 8) | data[idx + 4]
+
+        buf = self._buf
+        # Header: same ID, QR + AA, RD copied, RA; QDCOUNT 1; no NS/AR
+        buf[0] = data[0]
+        buf[1] = data[1]
+        buf[2] = 0x84 | (data[2] & 0x01)
+        buf[4:12] = b'\x00\x01\x00\x00\x00\x00\x00\x00'
+        buf[12:end] = data[12:end]
+        if idx - 12 >= 6 and data[idx - 5:idx + 1].lower() == _ARPA:
+            buf[3] = 0x83 # NXDOMAIN
+            return end
+        buf[3] = 0x80
+        if qclass != _CLASS_IN or (qtype != _TYPE_A and qtype != _TYPE_ANY):
+            return end # NODATA
+        buf[7] = 1 # ANCOUNT
+        stop = end + len(self._answer)
+        buf[end:stop] = self._answer
+        return stop
 
     async def run(self):
-        print(f"DNS Server listening on 53 (Hijacking to {self.ip})")
+        print(f"DNS Server listening on {self.port} (Hijacking to {self.ip})")
+        sock = self.sock
+        out = memoryview(self._buf)
         while True:
+            if _io_queue:
+                await _readable(sock)
             try:
-                data, addr = self.sock.recvfrom(1024)
-                # Parse Packet (Skip Header)
-                # Transaction ID (2), Flags (2), Questions (2), Answers (2)...
-                # Just copy ID and set Flags to Response (0x8180)
-                
-                # Minimum DNS Packet
-                if len(data) < 12: continue
-                
-                # Construct Response
-                # Header: ID, Flags(Response, NoError), QDCOUNT=1, ANCOUNT=1
-                response = data[:2] + b'\x81\x80' + data[4:6] + b'\x00\x01\x00\x00\x00\x00'
-                
-                # Question Section (Copy from request)
-                # Find end of qname (0 byte)
-                idx = 12
-                while idx < len(data) and data[idx] != 0:
-                    idx += data[idx] + 1
-                idx += 5 # Skip 0 byte + QTYPE(2) + QCLASS(2)
-                
-                response += data[12:idx]
-                
-                # Answer Section
-                # Name (Pointer to offset 12), TYPE(A=1), CLASS(IN=1), TTL(60), LEN(4), IP
-                response += b'\xc0\x0c' # Pointer to QNAME
-                response += b'\x00\x01\x00\x01' # Type A, Class IN
-                response += b'\x00\x00\x00\x3c' # TTL 60s
-                response += b'\x00\x04' # Data Length 4
-                
-                # IP Address
-                response += bytes(map(int, self.ip.split('.')))
-                
-                self.sock.sendto(response, addr)
+                # Drain every pending query before sleeping again
+                while True:
+                    data, addr = sock.recvfrom(512)
+                    if not self._allow(addr[0]):
+                        self.dropped += 1
+                        continue
+                    n = self.respond(data)
+                    if n:
+                        sock.sendto(out[:n], addr)
+                        self.answered += 1
             except OSError:
-                await uasyncio.sleep(0.1)
+                # EAGAIN: nothing left to read
+                if not _io_queue:
+                    await uasyncio.sleep_ms(POLL_MS)
             except Exception as e:
                 print(f"DNS Error: {e}")
                 await uasyncio.sleep(1)
@@ -53,3 +125,4 @@ class DNSServer:
 def start(ip):
     server = DNSServer(ip)
     uasyncio.create_task(server.run())
+    return server
@@ -0,0 +1,31 @@
+import uasyncio
+
+# Change notifications for the web UI's /api/events stream. Each topic has
+# a version counter; publish() bumps it and wakes every waiting subscriber,
+# which then sends the topics whose version it has not seen yet. A
+# subscriber busy writing cannot miss a change, since it compares versions
+# before waiting again.
+TOPICS = ("message", "led", "weather", "storage")
+
+_versions = {}
+for _t in TOPICS:
+    _versions[_t] = 0
+
+_changed = uasyncio.Event()
+
+def publish(topic):
+    _versions[topic] += 1
+    # Pulse: set() schedules the current waiters, clear() re-arms for the next
+    _changed.set()
+    _changed.clear()
+
+def version(topic):
+    return _versions[topic]
+
+async def wait(timeout_ms):
+    # True if something was published, False on timeout
+    try:
+        await uasyncio.wait_for_ms(_changed.wait(), timeout_ms)
+        return True
+    except uasyncio.TimeoutError:
+        return False
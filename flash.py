@@ -51,6 +51,7 @@ def prepare_build():
     # 4. Copy WWW
     if os.path.exists("www"):
         shutil.copytree("www", os.path.join(BUILD_DIR, "www"))
+        subprocess.run([sys.executable, "tools/precompress.py", os.path.join(BUILD_DIR, "www")], check=True)
 
 def main():
     if not os.path.exists(PORT):
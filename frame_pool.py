@@ -0,0 +1,53 @@
+import framebuf
+
+# Display frame geometry (128 x 296, 1 bit per pixel)
+WIDTH = 128
+HEIGHT = 296
+FRAME_SIZE = WIDTH * HEIGHT // 8
+
+# Front/back pair, allocated once at boot so redraws never touch the heap.
+# The front buffer mirrors what is currently in panel RAM, the back buffer
+# is the one handed out to renderers.
+_bufs = None
+_fbs = None
+_back = 0
+_borrowed = False
+_front_valid = False
+
+def init():
+    global _bufs, _fbs
+    if _bufs is not None: return
+    _bufs = (bytearray(FRAME_SIZE), bytearray(FRAME_SIZE))
+    _fbs = (
+        framebuf.FrameBuffer(_bufs[0], WIDTH, HEIGHT, framebuf.MONO_HLSB),
+        framebuf.FrameBuffer(_bufs[1], WIDTH, HEIGHT, framebuf.MONO_HLSB),
+    )
+
+def borrow():
+    # Returns (buf, fb) for the back buffer
+    global _borrowed
+    if _bufs is None:
+        init()
+    if _borrowed:
+        raise RuntimeError("Frame buffer already borrowed")
+    _borrowed = True
+    return _bufs[_back], _fbs[_back]
+
+def release(sent=False):
+    # sent=True: the back buffer is now in panel RAM and becomes the front
+    global _borrowed, _back, _front_valid
+    _borrowed = False
+    if sent:
+        _back ^= 1
+        _front_valid = True
+
+def front():
+    # Last frame sent to the panel, or None if panel RAM is unknown
+    if not _front_valid: return None
+    return _bufs[_back ^ 1]
+
+def invalidate():
+    # Call when panel RAM is lost (reset, deep sleep) or only partly
+    # written (a send that failed part way)
+    global _front_valid
+    _front_valid = False
@@ -1,31 +1,81 @@
 import hashlib
 
-def new(key, msg, digestmod):
+# Minimal HMAC (RFC 2104) for MicroPython with CPython's hmac.new() /
+# update() / digest() / hexdigest(). There is no copy(): MicroPython's hash
+# objects cannot be copied, and for the same reason digest() is final there.
+
+BLOCK_SIZE = 64 # sha1/sha256
+
+# Whether hash objects have copy() (CPython yes, MicroPython no); all hashlib
+# constructors on a port agree
+_CAN_COPY = hasattr(hashlib.sha256(), "copy")
+
+def _pads(key, digestmod):
+    if len(key) > BLOCK_SIZE:
+        key = digestmod(key).digest()
+    o_key_pad = bytearray(BLOCK_SIZE)
+    i_key_pad = bytearray(BLOCK_SIZE)
+    n = len(key)
+    for i in range(BLOCK_SIZE):
+        b = key[i] if i < n else 0
+        o_key_pad[i] = b ^ 0x5C
+        i_key_pad[i] = b ^ 0x36
+    return bytes(o_key_pad), bytes(i_key_pad)
+
+class Key:
     """
-    Minimal HMAC implementation.
+    Padded key material computed once, for signing or verifying many
+    messages under the same key. Where the hash object supports copy()
+    the keyed inner/outer states are cached too, so new() costs no hashing.
     """
-    block_size = 64 # for sha256
-    
-    if len(key) > block_size:
-        key = digestmod(key).digest()
-    if len(key) < block_size:
-        key = key + b'\x00' * (block_size - len(key))
-        
-    o_key_pad = bytes(x ^ 0x5c for x in key)
-    i_key_pad = bytes(x ^ 0x36 for x in key)
-    
-    return HMAC(o_key_pad, i_key_pad, digestmod, msg)
+    def __init__(self, key, digestmod=hashlib.sha256):
+        self.digestmod = digestmod
+        self.o_key, self.i_key = _pads(key, digestmod)
+        self.can_copy = _CAN_COPY
+        if self.can_copy:
+            self._inner = digestmod(self.i_key)
+            self._outer = digestmod(self.o_key)
+
+    def inner_state(self):
+        if self.can_copy:
+            return self._inner.copy()
+        return self.digestmod(self.i_key)
+
+    def outer_state(self):
+        if self.can_copy:
+            return self._outer.copy()
+        return self.digestmod(self.o_key)
+
+    def new(self, msg=None):
+        return HMAC(self, msg)
+
+    def digest(self, msg):
+        return HMAC(self, msg).digest()
+
+def new(key, msg=None, digestmod=None):
+    if isinstance(key, Key):
+        return HMAC(key, msg)
+    return HMAC(Key(key, digestmod or hashlib.sha256), msg)
 
 class HMAC:
-    def __init__(self, o_key, i_key, digestmod, msg):
-        self.o_key = o_key
-        self.i_key = i_key
-        self.digestmod = digestmod
-        self.inner = digestmod(i_key)
+    block_size = BLOCK_SIZE
+
+    def __init__(self, key, msg=None):
+        self.key = key
+        self.inner = key.inner_state()
+        if msg is not None:
+            self.inner.update(msg)
+
+    def update(self, msg):
         self.inner.update(msg)
-        
+
     def digest(self):
-        inner_hash = self.inner.digest()
-        outer = self.digestmod(self.o_key)
-        outer.update(inner_hash)
+        # With copy() support the running state is kept, so update() may
+        # continue afterwards, as in CPython. Otherwise digest() is final.
+        inner = self.inner.copy() if self.key.can_copy else self.inner
+        outer = self.key.outer_state()
+        outer.update(inner.digest())
         return outer.digest()
+
+    def hexdigest(self):
+        return "".join("%02x" % b for b in self.digest())
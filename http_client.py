@@ -0,0 +1,309 @@
+import uasyncio
+import usocket
+import time
+
+# Small async HTTP/1.1 GET client on uasyncio streams, shared by outbound
+# integrations (weather_api). Every connect and read is bounded by a
+# timeout, and failures before any body byte arrives (connect, timeouts,
+# 5xx) are retried with exponential backoff, so a slow server never stalls
+# the event loop. Name lookups are the exception: getaddrinfo blocks until
+# the resolver answers or times out. They are cached (see below) and done
+# at most once per get(), never retried within it.
+#
+# To keep the radio-on time per fetch short it also:
+# - caches resolved addresses for DNS_TTL_MS, and keeps using the last
+#   known address when a fresh lookup fails,
+# - keeps connections alive and reuses them for IDLE_MS, after which a
+#   background task closes them,
+# - decodes chunked bodies,
+# - sends If-None-Match / If-Modified-Since from the last 200 of a URL
+#   when asked to, so unchanged resources come back as a bodiless 304.
+TIMEOUT_MS = 10000
+RETRIES = 2
+BACKOFF_MS = 1000 # Doubled after every failed attempt
+DNS_TTL_MS = 60 * 60 * 1000 # Longer than weather_api's 15 min period
+IDLE_MS = 20 * 1000
+USER_AGENT = "ESP8266"
+
+# Socket reads land here; responses are never buffered whole. The lock
+# keeps requests (and so uses of the buffer) one at a time.
+_chunk = bytearray(512)
+_lock = uasyncio.Lock()
+
+_dns = {} # host -> (ip, ticks_ms expiry); kept past expiry as a fallback
+_pool = {} # (host, port) -> (reader, writer, ticks_ms last used)
+_validators = {} # url -> (etag, last_modified) of the last 200
+_reaper = None # Task closing idle pooled connections
+
+def split_url(url):
+    # "http://host[:port]/path" -> (host, port, "/path")
+    i = url.find("://")
+    if i >= 0:
+        url = url[i + 3:]
+    i = url.find("/")
+    hostport, path = (url, "/") if i < 0 else (url[:i], url[i:])
+    i = hostport.find(":")
+    if i < 0:
+        return hostport, 80, path
+    return hostport[:i], int(hostport[i + 1:]), path
+
+# --- DNS cache ---
+
+def _is_ip(host):
+    parts = host.split(".")
+    if len(parts) != 4:
+        return False
+    for p in parts:
+        if not p.isdigit():
+            return False
+    return True
+
+def resolve(host):
+    # Blocking getaddrinfo, but at most once per DNS_TTL_MS per host. If the
+    # lookup fails, the last known address is used rather than none.
+    if _is_ip(host):
+        return host
+    now = time.ticks_ms()  # type: ignore
+    entry = _dns.get(host)
+    if entry and time.ticks_diff(entry[1], now) > 0:  # type: ignore
+        return entry[0]
+    try:
+        ip = usocket.getaddrinfo(host, 80)[0][-1][0]
+    except Exception as e:
+        if not entry:
+            raise
+        print(f"DNS Error: {host}: {repr(e)}, using {entry[0]}")
+        return entry[0]
+    _dns[host] = (ip, time.ticks_add(now, DNS_TTL_MS))  # type: ignore
+    return ip
+
+def forget(host):
+    # Next resolve() looks the host up again; the old address stays as the
+    # fallback
+    entry = _dns.get(host)
+    if entry:
+        _dns[host] = (entry[0], time.ticks_ms())  # type: ignore
+
+# --- Connection pool ---
+
+async def _close(writer):
+    # uasyncio's Stream.close() is a no-op; wait_closed() closes the socket
+    try:
+        writer.close()
+        await writer.wait_closed()
+    except Exception:
+        pass
+
+async def close_idle(max_idle_ms=None):
+    # Closes pooled connections idle for longer than max_idle_ms (default
+    # IDLE_MS, 0: all)
+    if max_idle_ms is None:
+        max_idle_ms = IDLE_MS
+    now = time.ticks_ms()  # type: ignore
+    # Taken out of the pool before any await, so a request cannot pick one up
+    expired = []
+    for key in list(_pool):
+        if time.ticks_diff(now, _pool[key][2]) >= max_idle_ms:  # type: ignore
+            expired.append(_pool.pop(key)[1])
+    for writer in expired:
+        await _close(writer)
+
+async def _reap():
+    # Runs while anything is pooled, closing each connection once it has
+    # been idle for IDLE_MS rather than whenever the next request comes
+    global _reaper
+    try:
+        while _pool:
+            now = time.ticks_ms()  # type: ignore
+            wait = IDLE_MS
+            for conn in _pool.values():
+                wait = min(wait, IDLE_MS - time.ticks_diff(now, conn[2]))  # type: ignore
+            await uasyncio.sleep_ms(max(wait, 0))
+            await close_idle()
+    finally:
+        _reaper = None
+
+def _keep(host, port, reader, writer):
+    global _reaper
+    _pool[(host, port)] = (reader, writer, time.ticks_ms())  # type: ignore
+    if _reaper is None:
+        _reaper = uasyncio.create_task(_reap())
+
+async def _connect(host, ip, port, timeout_ms):
+    # Returns (reader, writer, reused)
+    await close_idle()
+    conn = _pool.pop((host, port), None)
+    if conn:
+        return conn[0], conn[1], True
+    try:
+        reader, writer = await uasyncio.wait_for_ms(uasyncio.open_connection(ip, port), timeout_ms)
+    except Exception:
+        forget(host) # The address may have moved; looked up on the next get()
+        raise
+    return reader, writer, False
+
+# --- Requests ---
+
+class _BodyStarted(Exception):
+    # Failure after part of the body reached the sink; not retried
+    pass
+
+class _Stale(Exception):
+    # A pooled connection the server had already closed
+    pass
+
+async def _readline(reader, timeout_ms):
+    return await uasyncio.wait_for_ms(reader.readline(), timeout_ms)
+
+async def _readinto(reader, n, timeout_ms):
+    # Reads up to n bytes (at most len(_chunk)) into _chunk
+    mv = memoryview(_chunk)
+    return await uasyncio.wait_for_ms(reader.readinto(mv[:min(n, len(_chunk))]), timeout_ms)
+
+async def _read_body(reader, length, chunked, sink, timeout_ms):
+    # Feeds the body to sink; length < 0 without chunking reads to EOF
+    mv = memoryview(_chunk)
+    delivered = 0
+    try:
+        while True:
+            if chunked:
+                line = await _readline(reader, timeout_ms)
+                remaining = int(line.split(b";")[0].strip(), 16)
+                if remaining == 0:
+                    # Trailers, up to the blank line
+                    while (await _readline(reader, timeout_ms)) not in (b"\r\n", b"\n", b""):
+                        pass
+                    return
+            else:
+                remaining = length if length >= 0 else len(_chunk)
+            while remaining > 0:
+                n = await _readinto(reader, remaining, timeout_ms)
+                if not n:
+                    if length < 0 and not chunked:
+                        return # Body delimited by EOF
+                    raise OSError("truncated body")
+                sink(mv[:n])
+                delivered += n
+                if length >= 0 or chunked:
+                    remaining -= n
+            if chunked:
+                await _readline(reader, timeout_ms) # CRLF after the chunk
+            elif length >= 0:
+                return
+    except Exception as e:
+        if delivered:
+            raise _BodyStarted()
+        raise e
+
+async def _exchange(reader, writer, reused, request, sink, timeout_ms):
+    # Returns (status, keep_alive, etag, last_modified)
+    try:
+        writer.write(request)
+        await uasyncio.wait_for_ms(writer.drain(), timeout_ms)
+        line = await _readline(reader, timeout_ms)
+    except Exception:
+        if reused:
+            raise _Stale()
+        raise
+    if not line:
+        if reused:
+            raise _Stale()
+        raise OSError("connection closed")
+    status = int(line[9:12])
+    keep = line.startswith(b"HTTP/1.1")
+    length = -1
+    chunked = False
+    etag = None
+    last_modified = None
+    while True:
+        line = await _readline(reader, timeout_ms)
+        if line in (b"\r\n", b"\n", b""):
+            break
+        i = line.find(b":")
+        if i < 0:
+            continue
+        name = line[:i].strip().lower()
+        value = line[i + 1:].strip()
+        if name == b"content-length":
+            length = int(value)
+        elif name == b"transfer-encoding":
+            chunked = b"chunked" in value.lower()
+        elif name == b"connection":
+            keep = value.lower() == b"keep-alive" or (keep and value.lower() != b"close")
+        elif name == b"etag":
+            etag = value.decode()
+        elif name == b"last-modified":
+            last_modified = value.decode()
+
+    if status == 304 or status == 204 or status < 200:
+        return status, keep, etag, last_modified
+    if status != 200:
+        # Error bodies are not wanted; drop the connection instead of reading
+        return status, False, None, None
+    await _read_body(reader, length, chunked, sink, timeout_ms)
+    if length < 0 and not chunked:
+        keep = False # Read to EOF
+    return status, keep, etag, last_modified
+
+async def _request(url, host, ip, port, path, sink, timeout_ms, conditional):
+    headers = f"GET {path} HTTP/1.1\r\nHost: {host}\r\nUser-Agent: {USER_AGENT}\r\nConnection: keep-alive\r\n"
+    if conditional and url in _validators:
+        etag, last_modified = _validators[url]
+        if etag:
+            headers += f"If-None-Match: {etag}\r\n"
+        if last_modified:
+            headers += f"If-Modified-Since: {last_modified}\r\n"
+    request = (headers + "\r\n").encode()
+
+    reader, writer, reused = await _connect(host, ip, port, timeout_ms)
+    try:
+        try:
+            status, keep, etag, last_modified = await _exchange(reader, writer, reused, request, sink, timeout_ms)
+        except _Stale:
+            # The server dropped the idle connection; once more on a new one
+            await _close(writer)
+            reader, writer, reused = await _connect(host, ip, port, timeout_ms)
+            status, keep, etag, last_modified = await _exchange(reader, writer, False, request, sink, timeout_ms)
+    except Exception:
+        await _close(writer)
+        raise
+    if keep:
+        _keep(host, port, reader, writer)
+    else:
+        await _close(writer)
+    if status == 200 and conditional and (etag or last_modified):
+        _validators[url] = (etag, last_modified)
+    return status
+
+async def get(url, sink, timeout_ms=None, retries=None, conditional=False):
+    # Streams the body of a 200 response to sink(memoryview) in chunks.
+    # Returns the HTTP status (304 if conditional and unchanged), or 0 if
+    # no response could be read.
+    if timeout_ms is None:
+        timeout_ms = TIMEOUT_MS
+    if retries is None:
+        retries = RETRIES
+    host, port, path = split_url(url)
+    delay = BACKOFF_MS
+    async with _lock:
+        # Blocking, so looked up once here rather than on every attempt
+        try:
+            ip = resolve(host)
+        except Exception as e:
+            print(f"DNS Error: {host}: {repr(e)}")
+            return 0
+        for attempt in range(retries + 1):
+            try:
+                status = await _request(url, host, ip, port, path, sink, timeout_ms, conditional)
+                if status < 500:
+                    return status
+                print(f"HTTP {status} from {host}")
+            except _BodyStarted:
+                print(f"HTTP Error: {host} failed mid-body")
+                return 0
+            except Exception as e:
+                print(f"HTTP Error: {host}: {repr(e)}")
+            if attempt < retries:
+                await uasyncio.sleep_ms(delay)
+                delay *= 2
+    return 0
@@ -1,9 +1,16 @@
 import time
+import uasyncio
 
 # Display resolution
 EPD_WIDTH = 128
 EPD_HEIGHT = 296
 
+# BUSY polling interval while yielding to the event loop
+BUSY_POLL_MS = 20
+
+# Without a BUSY pin, assume a refresh takes this long
+BUSY_FALLBACK_MS = 2000
+
 # Partial Refresh LUT (Generic 2.9")
 LUT_PARTIAL = bytearray([
     0x10, 0x18, 0x18, 0x08, 0x18, 0x18, 0x08, 0x00, 
@@ -12,6 +19,56 @@ LUT_PARTIAL = bytearray([
     0x00, 0x00, 0x00, 0x00, 0x00, 0x00
 ])
 
+# Precompiled command sequences: (command, data) byte strings replayed in a
+# single CS transaction. They are built once at import, so replaying them
+# allocates nothing.
+_X_END = (EPD_WIDTH // 8) - 1
+_Y_END = bytes([(EPD_HEIGHT - 1) & 0xFF, ((EPD_HEIGHT - 1) >> 8) & 0xFF])
+
+WRITE_RAM = b'\x24'  # WRITE_RAM (Black/White)
+
+SWRESET_SEQUENCE = (
+    (b'\x12', None),  # SWRESET
+)
+
+INIT_SEQUENCE = (
+    (b'\x01', _Y_END + b'\x00'),  # Driver output control
+    (b'\x11', b'\x03'),  # Data entry mode
+    (b'\x44', bytes([0x00, _X_END])),  # Set Ram-X address start/end position
+    (b'\x45', b'\x00\x00' + _Y_END),  # Set Ram-Y address start/end position
+    (b'\x3C', b'\x05'),  # BorderWaveform
+    (b'\x21', b'\x00\x80'),  # Display update control
+    (b'\x18', b'\x80'),  # Read built-in temperature sensor
+)
+
+FULL_WINDOW_SEQUENCE = (
+    (b'\x44', bytes([0x00, _X_END])),
+    (b'\x45', b'\x00\x00' + _Y_END),
+    (b'\x4E', b'\x00'),
+    (b'\x4F', b'\x00\x00'),
+)
+
+UPDATE_FULL_SEQUENCE = (
+    (b'\x22', b'\xF7'),
+    (b'\x20', None),  # Master activation
+)
+
+UPDATE_PARTIAL_SEQUENCE = (
+    (b'\x32', LUT_PARTIAL),
+    (b'\x22', b'\xC7'),
+    (b'\x20', None),
+)
+
+# Standard Fast Mode (0xFF loads OTP LUT Mode 2)
+UPDATE_OTP_PARTIAL_SEQUENCE = (
+    (b'\x22', b'\xFF'),
+    (b'\x20', None),
+)
+
+SLEEP_SEQUENCE = (
+    (b'\x10', b'\x01'),  # Deep sleep
+)
+
 class EPD:
     def __init__(self, spi, cs, dc, busy, rst=None):
         self.spi = spi
@@ -30,23 +87,48 @@ class EPD:
         self.width = EPD_WIDTH
         self.height = EPD_HEIGHT
 
-    def _command(self, command, data=None):
-        self.cs(1)
+        # Preallocated argument buffers for per-frame register writes
+        self._cmd_buf = bytearray(1)
+        self._x_range = bytearray(2)
+        self._y_range = bytearray(4)
+        self._x_ptr = bytearray(1)
+        self._y_ptr = bytearray(2)
+
+        # Accumulated stage timings (us) since the last reset_timing()
+        self.spi_us = 0
+        self.busy_us = 0
+
+    def reset_timing(self):
+        self.spi_us = 0
+        self.busy_us = 0
+
+    def _write(self, command, data=None):
+        # One command plus arguments; the caller holds CS low
         self.dc(0)
+        self.spi.write(command)
+        if data is not None:
+            self.dc(1)
+            self.spi.write(data)
+
+    def _send_sequence(self, sequence):
         self.cs(0)
-        self.spi.write(bytearray([command]))
+        for command, data in sequence:
+            self._write(command, data)
         self.cs(1)
-        if data is not None:
-            self._data(data)
 
-    def _data(self, data):
+    def _command(self, command, data=None):
+        self._cmd_buf[0] = command
+        self.cs(0)
+        self._write(self._cmd_buf, data)
         self.cs(1)
+
+    def _data(self, data):
         self.dc(1)
         self.cs(0)
         self.spi.write(data)
         self.cs(1)
 
-    def init(self):
+    def reset(self):
         # Hardware reset
         if self.rst:
             self.rst(1)
@@ -56,55 +138,112 @@ class EPD:
             self.rst(1)
             time.sleep_ms(200)  # type: ignore
 
-        self._command(0x12)  # SWRESET
-        self.wait_until_idle()
+    async def reset_async(self):
+        if self.rst:
+            self.rst(1)
+            await uasyncio.sleep_ms(200)
+            self.rst(0)
+            await uasyncio.sleep_ms(200)
+            self.rst(1)
+            await uasyncio.sleep_ms(200)
 
-        self._command(
-            0x01,
-            bytearray([(EPD_HEIGHT - 1) & 0xFF, ((EPD_HEIGHT - 1) >> 8) & 0xFF, 0x00]),
-        )  # Driver output control
-        self._command(0x11, bytearray([0x03]))  # Data entry mode
-        self._command(
-            0x44, bytearray([0x00, (EPD_WIDTH // 8) - 1])
-        )  # Set Ram-X address start/end position
-        self._command(
-            0x45,
-            bytearray(
-                [0x00, 0x00, (EPD_HEIGHT - 1) & 0xFF, ((EPD_HEIGHT - 1) >> 8) & 0xFF]
-            ),
-        )  # Set Ram-Y address start/end position
-        self._command(0x3C, bytearray([0x05]))  # BorderWaveform
-        self._command(0x21, bytearray([0x00, 0x80]))  #  Display update control
-        self._command(0x18, bytearray([0x80]))  # Read built-in temperature sensor
+    def init(self):
+        self.reset()
+        self._send_sequence(SWRESET_SEQUENCE)
         self.wait_until_idle()
+        self._send_sequence(INIT_SEQUENCE)
+        self.wait_until_idle()
+
+    async def init_async(self):
+        await self.reset_async()
+        self._send_sequence(SWRESET_SEQUENCE)
+        await self.wait_until_idle_async()
+        self._send_sequence(INIT_SEQUENCE)
+        await self.wait_until_idle_async()
 
     def wait_until_idle(self):
+        t0 = time.ticks_us()  # type: ignore
         if self.busy:
             while self.busy.value() == 1:
                 time.sleep_ms(50)  # type: ignore
         else:
-            time.sleep_ms(2000)  # type: ignore
+            time.sleep_ms(BUSY_FALLBACK_MS)  # type: ignore
+        self.busy_us += time.ticks_diff(time.ticks_us(), t0)  # type: ignore
+
+    async def wait_until_idle_async(self):
+        # Same as wait_until_idle, but lets other tasks run meanwhile
+        t0 = time.ticks_us()  # type: ignore
+        if self.busy:
+            while self.busy.value() == 1:
+                await uasyncio.sleep_ms(BUSY_POLL_MS)
+        else:
+            await uasyncio.sleep_ms(BUSY_FALLBACK_MS)
+        self.busy_us += time.ticks_diff(time.ticks_us(), t0)  # type: ignore
+
+    def _fill_window(self, x_start, y_start, x_end, y_end):
+        # X is in bytes (8 px per unit), Y in rows; both ends inclusive
+        self._x_range[0] = x_start
+        self._x_range[1] = x_end
+        y_range = self._y_range
+        y_range[0] = y_start & 0xFF
+        y_range[1] = (y_start >> 8) & 0xFF
+        y_range[2] = y_end & 0xFF
+        y_range[3] = (y_end >> 8) & 0xFF
+        self._x_ptr[0] = x_start
+        self._y_ptr[0] = y_start & 0xFF
+        self._y_ptr[1] = (y_start >> 8) & 0xFF
+
+    def _write_window(self):
+        self._write(b'\x44', self._x_range)
+        self._write(b'\x45', self._y_range)
+        self._write(b'\x4E', self._x_ptr)
+        self._write(b'\x4F', self._y_ptr)
 
     def set_frame_memory(self, image):
-        self._command(0x24)  # WRITE_RAM (Black/White)
-        self._data(image)
+        # Window, cursor and the whole frame in one transaction
+        t0 = time.ticks_us()  # type: ignore
+        self.cs(0)
+        for command, data in FULL_WINDOW_SEQUENCE:
+            self._write(command, data)
+        self._write(WRITE_RAM, image)
+        self.cs(1)
+        self.spi_us += time.ticks_diff(time.ticks_us(), t0)  # type: ignore
+
+    def set_frame_rows(self, image, y_start, y_end):
+        # Send rows y_start..y_end (inclusive) of a full frame: full width,
+        # so the band is contiguous in the buffer and goes out in one write
+        t0 = time.ticks_us()  # type: ignore
+        stride = EPD_WIDTH // 8
+        self._fill_window(0, y_start, stride - 1, y_end)
+        self.cs(0)
+        self._write_window()
+        self._write(WRITE_RAM, memoryview(image)[y_start * stride:(y_end + 1) * stride])
+        self.cs(1)
+        self.spi_us += time.ticks_diff(time.ticks_us(), t0)  # type: ignore
 
     def display_frame(self):
-        self._command(0x22, bytearray([0xF7]))
-        self._command(0x20)
+        self._send_sequence(UPDATE_FULL_SEQUENCE)
         self.wait_until_idle()
 
+    async def display_frame_async(self):
+        self._send_sequence(UPDATE_FULL_SEQUENCE)
+        await self.wait_until_idle_async()
+
     def display_frame_partial(self):
-        self._command(0x32, LUT_PARTIAL)
-        self._command(0x22, bytearray([0xC7]))
-        self._command(0x20)
+        self._send_sequence(UPDATE_PARTIAL_SEQUENCE)
         self.wait_until_idle()
 
+    async def display_frame_partial_async(self):
+        self._send_sequence(UPDATE_PARTIAL_SEQUENCE)
+        await self.wait_until_idle_async()
+
     def display_frame_otp_partial(self):
-        # Try Standard Fast Mode (0xFF loads OTP LUT Mode 2)
-        self._command(0x22, bytearray([0xFF])) 
-        self._command(0x20)
+        self._send_sequence(UPDATE_OTP_PARTIAL_SEQUENCE)
         self.wait_until_idle()
 
+    async def display_frame_otp_partial_async(self):
+        self._send_sequence(UPDATE_OTP_PARTIAL_SEQUENCE)
+        await self.wait_until_idle_async()
+
     def sleep(self):
-        self._command(0x10, bytearray([0x01]))
+        self._send_sequence(SLEEP_SEQUENCE)
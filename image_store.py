@@ -0,0 +1,196 @@
+import os
+import frame_pool
+
+# Named full-screen images, stored PackBits run-length encoded:
+#   n = 0..127   -> copy the next n + 1 bytes
+#   n = 129..255 -> repeat the next byte 257 - n times
+#   n = 128      -> no-op
+FLASH_DIR = "/images"
+SD_DIR = "/sd/images"
+EXT = ".rle"
+MAX_NAME = 16
+DEFAULT_SLOT = "default"
+LEGACY_FILE = "image.bin" # Raw frame from before slots existed
+
+# custom_message value that puts an image on screen: "__IMAGE__:<slot>"
+IMAGE_PREFIX = "__IMAGE__"
+
+_chunk = bytearray(256)
+_dir = None # Slot directory, resolved once by init()
+
+def valid_name(name):
+    if not name or len(name) > MAX_NAME:
+        return False
+    for c in name:
+        if not (c.isalpha() or c.isdigit() or c in "-_"):
+            return False
+    return True
+
+def _exists(path):
+    try:
+        os.stat(path)
+        return True
+    except OSError:
+        return False
+
+def init(sd_mounted):
+    # Called once after the SD mount attempt; prefers the card when mounted
+    global _dir
+    _dir = SD_DIR if sd_mounted else FLASH_DIR
+    if not _exists(_dir):
+        try: os.mkdir(_dir)
+        except OSError: pass
+
+def slot_dir():
+    if _dir is None:
+        init(_exists("/sd"))
+    return _dir
+
+def _path(name):
+    return f"{slot_dir()}/{name}{EXT}"
+
+def message_for(name):
+    return f"{IMAGE_PREFIX}:{name}"
+
+def slot_from_message(message):
+    # Returns the slot a custom_message selects, or None for normal screens
+    if not message.startswith(IMAGE_PREFIX):
+        return None
+    name = message[len(IMAGE_PREFIX) + 1:]
+    return name or DEFAULT_SLOT
+
+def encode(data):
+    out = bytearray()
+    n = len(data)
+    i = 0
+    while i < n:
+        # Repeat run
+        j = i + 1
+        while j < n and j - i < 128 and data[j] == data[i]:
+            j += 1
+        if j - i >= 2:
+            out.append(257 - (j - i))
+            out.append(data[i])
+            i = j
+            continue
+        # Literal run, up to the next repeat of 2+ bytes
+        j = i + 1
+        while j < n and j - i < 128 and not (j + 1 < n and data[j] == data[j + 1]):
+            j += 1
+        out.append(j - i - 1)
+        out.extend(data[i:j])
+        i = j
+    return bytes(out)
+
+def decoded_size(data):
+    # Validates an encoded stream without decoding it
+    size = 0
+    i = 0
+    n = len(data)
+    while i < n:
+        b = data[i]
+        if b < 128:
+            size += b + 1
+            i += b + 2
+        elif b > 128:
+            size += 257 - b
+            i += 2
+        else:
+            i += 1
+    return size if i == n else -1
+
+def decode_into(f, buf):
+    # Streams an encoded file into buf using a small fixed chunk
+    size = len(buf)
+    pos = 0
+    literal = 0 # Literal bytes still to copy
+    repeat = 0 # Pending repeat count (byte follows)
+    while True:
+        n = f.readinto(_chunk)
+        if not n: break
+        i = 0
+        while i < n:
+            b = _chunk[i]
+            i += 1
+            if literal:
+                if pos >= size: raise ValueError("Image too large")
+                buf[pos] = b
+                pos += 1
+                literal -= 1
+            elif repeat:
+                end = pos + repeat
+                if end > size: raise ValueError("Image too large")
+                while pos < end:
+                    buf[pos] = b
+                    pos += 1
+                repeat = 0
+            elif b < 128:
+                literal = b + 1
+            elif b > 128:
+                repeat = 257 - b
+    if pos != size or literal or repeat:
+        raise ValueError("Corrupt image")
+
+def save(name, data, encoded=False):
+    if not valid_name(name):
+        raise ValueError("Invalid slot name")
+    if encoded:
+        if decoded_size(data) != frame_pool.FRAME_SIZE:
+            raise ValueError("Encoded image does not decode to a full frame")
+    else:
+        if len(data) != frame_pool.FRAME_SIZE:
+            raise ValueError(f"Invalid size: {len(data)}, expected {frame_pool.FRAME_SIZE}")
+        data = encode(data)
+    with open(_path(name), "wb") as f:
+        f.write(data)
+    return len(data)
+
+def load_into(name, buf):
+    if not valid_name(name):
+        return False
+    try:
+        with open(_path(name), "rb") as f:
+            decode_into(f, buf)
+        return True
+    except OSError:
+        pass
+    if name == DEFAULT_SLOT:
+        try:
+            with open(LEGACY_FILE, "rb") as f:
+                return f.readinto(buf) == len(buf)
+        except OSError:
+            pass
+    return False
+
+def exists(name):
+    if valid_name(name) and _exists(_path(name)):
+        return True
+    return name == DEFAULT_SLOT and _exists(LEGACY_FILE)
+
+def delete(name):
+    if not valid_name(name):
+        return False
+    try:
+        os.remove(_path(name))
+        return True
+    except OSError:
+        return False
+
+def list_slots():
+    base = slot_dir()
+    slots = []
+    try:
+        for fname in os.listdir(base):
+            if fname.endswith(EXT):
+                size = os.stat(f"{base}/{fname}")[6]
+                slots.append({"name": fname[:-len(EXT)], "size": size})
+    except OSError:
+        pass
+    # load_into() falls back to the raw legacy file for the default slot
+    if not any(s["name"] == DEFAULT_SLOT for s in slots):
+        try:
+            slots.append({"name": DEFAULT_SLOT, "size": os.stat(LEGACY_FILE)[6]})
+        except OSError:
+            pass
+    slots.sort(key=lambda s: s["name"])
+    return slots
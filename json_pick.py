@@ -0,0 +1,152 @@
+# Incremental JSON field extractor. Bytes are fed in arbitrary chunks and
+# only the requested fields are kept, so memory use does not depend on the
+# document size.
+#
+# fields maps a top-level key to the keys wanted inside it:
+#   {"current_weather": ("temperature", "weathercode"),
+#    "daily": ("time", "temperature_2m_max")}
+# A wanted scalar is stored as is; a wanted array of scalars keeps its
+# first max_items entries as a list:
+#   result == {"current_weather": {"temperature": 21.5, ...},
+#              "daily": {"time": ["2026-10-18", ...], ...}}
+
+MAX_TOKEN = 48 # Longer strings/numbers are skipped, never matched
+
+_IDLE = 0
+_STRING = 1
+_ESCAPE = 2
+_LITERAL = 3
+
+# Byte classes, looked up per input byte
+_WS = 1
+_STRUCT = 2
+_CLASS = bytearray(256)
+for _b in b" \t\r\n":
+    _CLASS[_b] = _WS
+for _b in b"{}[],:":
+    _CLASS[_b] = _STRUCT
+
+class Picker:
+    def __init__(self, fields, max_items=3):
+        self.fields = fields
+        self.max_items = max_items
+        self.result = {}
+        self._stack = [] # Opening byte, { or [, per open container
+        self._keys = [] # Current key (objects) or index (arrays) per level
+        self._tok = bytearray(MAX_TOKEN)
+        self._len = 0
+        self._overflow = False
+        self._state = _IDLE
+        self._expect_key = False
+
+    def _push(self, b):
+        if self._len < MAX_TOKEN:
+            self._tok[self._len] = b
+            self._len += 1
+        else:
+            self._overflow = True
+
+    def _wanted(self):
+        # Returns (top, key, index) when the current value is wanted
+        stack = self._stack
+        depth = len(stack)
+        if depth < 2 or depth > 3 or stack[0] != 0x7B or stack[1] != 0x7B:
+            return None
+        keys = self._keys
+        wanted = self.fields.get(keys[0])
+        if not wanted or keys[1] not in wanted:
+            return None
+        if depth == 2:
+            return keys[0], keys[1], -1
+        if stack[2] == 0x5B and keys[2] < self.max_items:
+            return keys[0], keys[1], keys[2]
+        return None
+
+    def _token(self, is_string):
+        n = self._len
+        self._len = 0
+        overflow = self._overflow
+        self._overflow = False
+        if self._expect_key and is_string:
+            # Only the first two levels are ever matched against
+            if len(self._stack) <= 2:
+                self._keys[-1] = None if overflow else bytes(self._tok[:n]).decode()
+            return
+        if overflow:
+            return
+        target = self._wanted()
+        if target is None:
+            return
+        raw = bytes(self._tok[:n])
+        if is_string:
+            value = raw.decode()
+        elif raw == b"true":
+            value = True
+        elif raw == b"false":
+            value = False
+        elif raw == b"null":
+            value = None
+        else:
+            try:
+                value = int(raw)
+            except ValueError:
+                value = float(raw)
+        top, key, index = target
+        group = self.result.get(top)
+        if group is None:
+            group = self.result[top] = {}
+        if index < 0:
+            group[key] = value
+        else:
+            items = group.get(key)
+            if items is None:
+                items = group[key] = []
+            items.append(value)
+
+    def _structural(self, b):
+        if b == 0x7B or b == 0x5B: # { [
+            self._stack.append(b)
+            self._keys.append(None if b == 0x7B else 0)
+            self._expect_key = b == 0x7B
+        elif b == 0x7D or b == 0x5D: # } ]
+            if self._stack:
+                self._stack.pop()
+                self._keys.pop()
+            self._expect_key = False
+        elif b == 0x2C: # ,
+            if self._stack and self._stack[-1] == 0x5B:
+                self._keys[-1] += 1
+            else:
+                self._expect_key = True
+        elif b == 0x3A: # :
+            self._expect_key = False
+
+    def feed(self, data):
+        for b in data:
+            state = self._state
+            if state == _STRING:
+                if b == 0x5C: # backslash
+                    self._state = _ESCAPE
+                    self._push(b)
+                elif b == 0x22: # closing quote
+                    self._state = _IDLE
+                    self._token(True)
+                else:
+                    self._push(b)
+            elif state == _ESCAPE:
+                self._state = _STRING
+                self._push(b)
+            elif state == _LITERAL:
+                if _CLASS[b]:
+                    self._state = _IDLE
+                    self._token(False)
+                    self._structural(b)
+                else:
+                    self._push(b)
+            elif b == 0x22:
+                self._state = _STRING
+            elif _CLASS[b] == _STRUCT:
+                self._structural(b)
+            elif not _CLASS[b]:
+                self._state = _LITERAL
+                self._push(b)
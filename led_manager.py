@@ -1,8 +1,9 @@
 import machine
 import neopixel
 import time
-import ujson
-import os
+import uasyncio
+import config_store
+import events
 
 # --- LED Configuration ---
 PIN_LEDS = 9
@@ -18,41 +19,52 @@ ENABLED = True
 CURRENT_MODE = MODE_AUTO
 MANUAL_COLORS = [(0,0,0)] * NUM_LEDS
 
-CONFIG_FILE = "led_config.json"
+# Perceptual correction applied on top of GLOBAL_BRIGHTNESS. 1.0 keeps the
+# linear response the status colours below were picked for; ~2.2 gives
+# smoother fades at the cost of darker mid tones.
+GAMMA = 1.0
+
+# Animation frame interval for animator_task
+FRAME_MS = 20
 
 led_pin = machine.Pin(PIN_LEDS, machine.Pin.OUT)
 pixels = neopixel.NeoPixel(led_pin, NUM_LEDS)
 
+# Channel value (0-255) -> output value, rebuilt when the brightness changes
+_lut = bytearray(256)
+
+def _build_lut():
+    for v in range(256):
+        _lut[v] = int(((v / 255) ** GAMMA) * 255 * GLOBAL_BRIGHTNESS + 0.5)
+
 def save_state():
-    try:
-        data = {
-            "brightness": GLOBAL_BRIGHTNESS,
-            "enabled": ENABLED,
-            "mode": CURRENT_MODE,
-            "colors": MANUAL_COLORS
-        }
-        with open(CONFIG_FILE, "w") as f:
-            ujson.dump(data, f)
-    except Exception as e:
-        print(f"Save LED Config Error: {e}")
+    # Coalesced by config_store, so slider drags cost one flash write
+    config_store.put("led", {
+        "brightness": GLOBAL_BRIGHTNESS,
+        "enabled": ENABLED,
+        "mode": CURRENT_MODE,
+        "colors": MANUAL_COLORS
+    })
+    events.publish("led")
 
 def load_state():
     global GLOBAL_BRIGHTNESS, ENABLED, CURRENT_MODE, MANUAL_COLORS
-    try:
-        with open(CONFIG_FILE, "r") as f:
-            data = ujson.load(f)
-            GLOBAL_BRIGHTNESS = data.get("brightness", 0.1)
-            ENABLED = data.get("enabled", True)
-            CURRENT_MODE = data.get("mode", MODE_AUTO)
-            MANUAL_COLORS = data.get("colors", [(0,0,0)] * NUM_LEDS)
-    except:
-        pass # Use defaults
+    data = config_store.get("led")
+    if not data:
+        return # Use defaults
+    GLOBAL_BRIGHTNESS = data.get("brightness", 0.1)
+    ENABLED = data.get("enabled", True)
+    CURRENT_MODE = data.get("mode", MODE_AUTO)
+    colors = data.get("colors", [(0,0,0)] * NUM_LEDS)
+    MANUAL_COLORS = [(_clamp(r), _clamp(g), _clamp(b)) for r, g, b in colors]
 
 def toggle(state):
     global ENABLED
     ENABLED = state
     save_state()
     if not ENABLED:
+        stop()
+        stop_frames()
         pixels.fill((0,0,0))
         pixels.write()
     else:
@@ -62,19 +74,20 @@ def set_mode(mode):
     global CURRENT_MODE
     CURRENT_MODE = mode
     save_state()
+    stop_frames() # Picking a mode takes the LEDs back from the host
+    if mode != MODE_AUTO:
+        stop()
     refresh()
 
 def set_brightness(val):
     global GLOBAL_BRIGHTNESS
     GLOBAL_BRIGHTNESS = max(0.0, min(1.0, float(val)))
+    _build_lut()
     save_state()
     refresh()
 
 def apply_color(r, g, b):
-    r = int(r * GLOBAL_BRIGHTNESS)
-    g = int(g * GLOBAL_BRIGHTNESS)
-    b = int(b * GLOBAL_BRIGHTNESS)
-    return (r, g, b)
+    return (_lut[r], _lut[g], _lut[b])
 
 def refresh():
     if not ENABLED:
@@ -88,50 +101,215 @@ def refresh():
             pixels[i] = apply_color(r, g, b)
         pixels.write()
 
+def _clamp(v):
+    return max(0, min(255, int(v)))
+
 def set_manual_pixel(i, r, g, b):
     if 0 <= i < NUM_LEDS:
-        MANUAL_COLORS[i] = (r, g, b)
+        MANUAL_COLORS[i] = (_clamp(r), _clamp(g), _clamp(b))
         save_state()
     if CURRENT_MODE == MODE_MANUAL:
         refresh()
 
-def set_led(r, g, b):
+def _show(r, g, b):
     if not ENABLED: return
-    
+
     c = apply_color(r, g, b)
     for i in range(NUM_LEDS):
         pixels[i] = c
     pixels.write()
 
+def set_led(r, g, b):
+    # An explicit colour replaces a looping animation at once. A finite one
+    # plays out first and leaves this colour on, as the blocking animations
+    # used to. Frames streamed by the host are left alone.
+    global _anim_hold
+    if host_owned(): return
+    if _anim is not None and not _anim_loop:
+        _anim_hold = (r, g, b)
+        return
+    stop()
+    _show(r, g, b)
+
 def led_off():
     if CURRENT_MODE == MODE_AUTO:
         set_led(0, 0, 0)
 
-def breathe(r, g, b, cycles=1, speed=0.05):
-    if CURRENT_MODE != MODE_AUTO: return
-    
-    for _ in range(cycles):
-        for i in range(0, 101, 5):
-            factor = i / 100
-            set_led(int(r * factor), int(g * factor), int(b * factor))
-            time.sleep(speed)
-        for i in range(100, -1, -5):
-            factor = i / 100
-            set_led(int(r * factor), int(g * factor), int(b * factor))
-            time.sleep(speed)
-    led_off()
+# --- Animations ---
+#
+# An animation is a tuple of keyframes (t_ms, r, g, b), t_ms increasing from
+# 0. The colour is interpolated linearly between neighbouring keyframes; two
+# keyframes at the same time give a hard step. One pass lasts until the
+# last keyframe. animator_task advances the current animation every FRAME_MS
+# without blocking the event loop.
+
+_anim = None # Keyframes being played
+_anim_start = 0
+_anim_end = 0 # ticks_ms when the last pass ends, unless looping
+_anim_loop = False
+_anim_hold = None # Colour left on afterwards; None turns the LEDs off
+_wake = uasyncio.Event()
+
+# Raw RGB frames streamed by the host, NUM_LEDS * 3 bytes per frame. While
+# a sequence plays, and for HOST_HOLD_MS after the last frame was shown,
+# the LEDs belong to the host: status colours and animations are skipped.
+FRAME_BYTES = NUM_LEDS * 3
+MAX_FRAMES = 256
+HOST_HOLD_MS = 10 * 1000
+_host_until = None # ticks_ms deadline of the hold
+_seq = None
+_seq_ms = 0
+_seq_start = 0
+_seq_end = 0
+_seq_loop = False
+
+def blink(r, g, b, on_ms, off_ms):
+    return ((0, r, g, b), (on_ms, r, g, b), (on_ms, 0, 0, 0), (on_ms + off_ms, 0, 0, 0))
+
+def fade(r, g, b, period_ms):
+    # Black -> colour -> black
+    half = period_ms // 2
+    return ((0, 0, 0, 0), (half, r, g, b), (period_ms, 0, 0, 0))
+
+HEARTBEAT = ((0, 64, 64, 64), (100, 64, 64, 64))
+WIFI_SUCCESS = blink(0, 255, 0, 100, 100)
+
+def play(keyframes, repeat=1, hold=None):
+    # repeat=0 loops until stop() or set_led(). System animations only run in
+    # MODE_AUTO, like the other status colours.
+    global _anim, _anim_start, _anim_end, _anim_loop, _anim_hold
+    if CURRENT_MODE != MODE_AUTO or host_owned(): return
+    stop()
+    now = time.ticks_ms()  # type: ignore
+    _anim = keyframes
+    _anim_start = now
+    _anim_end = time.ticks_add(now, keyframes[-1][0] * repeat)  # type: ignore
+    _anim_loop = repeat == 0
+    _anim_hold = hold
+    _wake.set()
+
+def stop():
+    # Ends the system animation; host frames are left alone
+    global _anim
+    _anim = None
+
+def stop_frames():
+    # Ends host frames and hands the LEDs back to the system
+    global _seq, _host_until
+    _seq = None
+    _host_until = None
+
+def _hold():
+    global _host_until
+    _host_until = time.ticks_add(time.ticks_ms(), HOST_HOLD_MS)  # type: ignore
+
+def host_owned():
+    global _host_until
+    if _seq is not None:
+        return True
+    if _host_until is None:
+        return False
+    if time.ticks_diff(_host_until, time.ticks_ms()) > 0:  # type: ignore
+        return True
+    _host_until = None
+    return False
+
+def is_playing():
+    return _anim is not None or host_owned()
+
+def show_frame(frame, offset=0):
+    # One raw RGB frame straight to the strip, through the brightness
+    # table; nothing is saved
+    if not ENABLED: return
+    lut = _lut
+    for i in range(NUM_LEDS):
+        j = offset + i * 3
+        pixels[i] = (lut[frame[j]], lut[frame[j + 1]], lut[frame[j + 2]])
+    pixels.write()
+
+def hold_frame(frame):
+    # A single host frame, kept on for HOST_HOLD_MS
+    global _seq
+    _seq = None
+    stop()
+    show_frame(frame)
+    _hold()
+
+def play_frames(data, interval_ms, repeat=1):
+    # Steps through the frames in data every interval_ms, in any mode;
+    # repeat=0 loops until stop_frames(). The last frame is then held for
+    # HOST_HOLD_MS.
+    global _seq, _seq_ms, _seq_start, _seq_end, _seq_loop
+    stop()
+    now = time.ticks_ms()  # type: ignore
+    _seq = data
+    _seq_ms = max(interval_ms, FRAME_MS)
+    _seq_start = now
+    _seq_end = time.ticks_add(now, (len(data) // FRAME_BYTES) * _seq_ms * repeat)  # type: ignore
+    _seq_loop = repeat == 0
+    _wake.set()
+
+def _frame(keyframes, t):
+    # Colour at t ms into one pass, integer math only
+    prev = keyframes[0]
+    for kf in keyframes:
+        if kf[0] >= t:
+            span = kf[0] - prev[0]
+            if span <= 0:
+                return kf[1], kf[2], kf[3]
+            dt = t - prev[0]
+            return (prev[1] + (kf[1] - prev[1]) * dt // span,
+                    prev[2] + (kf[2] - prev[2]) * dt // span,
+                    prev[3] + (kf[3] - prev[3]) * dt // span)
+        prev = kf
+    return prev[1], prev[2], prev[3]
+
+async def animator_task():
+    global _anim, _seq
+    while True:
+        seq = _seq
+        if seq is not None:
+            now = time.ticks_ms()  # type: ignore
+            count = len(seq) // FRAME_BYTES
+            if not _seq_loop and time.ticks_diff(now, _seq_end) >= 0:  # type: ignore
+                _seq = None
+                show_frame(seq, (count - 1) * FRAME_BYTES)
+                _hold()
+                continue
+            n = (time.ticks_diff(now, _seq_start) // _seq_ms) % count  # type: ignore
+            show_frame(seq, n * FRAME_BYTES)
+            await uasyncio.sleep_ms(FRAME_MS)
+            continue
+        keyframes = _anim
+        if keyframes is None:
+            _wake.clear()
+            await _wake.wait()
+            continue
+        now = time.ticks_ms()  # type: ignore
+        if not _anim_loop and time.ticks_diff(now, _anim_end) >= 0:  # type: ignore
+            _anim = None
+            if _anim_hold:
+                _show(*_anim_hold)
+            elif CURRENT_MODE == MODE_AUTO:
+                _show(0, 0, 0)
+            continue
+        period = keyframes[-1][0]
+        elapsed = time.ticks_diff(now, _anim_start)  # type: ignore
+        r, g, b = _frame(keyframes, elapsed % period if period else 0)
+        _show(r, g, b)
+        await uasyncio.sleep_ms(FRAME_MS)
+
+def breathe(r, g, b, cycles=1, speed=0.05, hold=None):
+    # Same timing as the old blocking version: 42 steps of `speed` seconds
+    play(fade(r, g, b, int(42 * speed * 1000)), cycles, hold)
 
 # --- System Functions ---
 
 def led_wifi_wait():
-    breathe(255, 200, 0, cycles=1, speed=0.02)
+    breathe(255, 200, 0, cycles=0, speed=0.02)
 
 def led_wifi_success():
-    for _ in range(3):
-        set_led(0, 255, 0)
-        time.sleep(0.1)
-        set_led(0, 0, 0)
-        time.sleep(0.1)
+    play(WIFI_SUCCESS, 3)
 
 def led_wifi_fail():
     set_led(255, 0, 0)
@@ -140,10 +318,8 @@ def led_syncing():
     if CURRENT_MODE == MODE_AUTO: set_led(0, 0, 255)
 
 def led_heartbeat():
-    if CURRENT_MODE == MODE_AUTO:
-        set_led(64, 64, 64) 
-        time.sleep(0.1)
-        led_off()
+    if CURRENT_MODE == MODE_AUTO and not is_playing():
+        play(HEARTBEAT)
 
 def led_minute_update():
     if CURRENT_MODE == MODE_AUTO: set_led(0, 255, 255)
@@ -153,4 +329,5 @@ def led_web_request():
 
 # Init
 load_state()
+_build_lut()
 refresh()
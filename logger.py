@@ -1,58 +1,147 @@
 import os
 import time
+import uasyncio
 
 LOG_FILE = "system.log"
 BACKUP_FILE = "system.old.log"
 MAX_SIZE = 10 * 1024 # 10KB
 
-def rotate():
-    try:
-        if os.stat(LOG_FILE)[6] > MAX_SIZE:
-            try: os.remove(BACKUP_FILE)
-            except: pass
-            os.rename(LOG_FILE, BACKUP_FILE)
-    except:
-        pass
-
-def write(level, message):
+# Severity levels; records below `level` are dropped before formatting
+DEBUG = 10
+INFO = 20
+ERROR = 40
+level = INFO
+
+# New lines are queued in a RAM ring; flush_task appends them to
+# LOG_FILE once FLUSH_BYTES are pending or FLUSH_MS after the oldest one
+RING_SIZE = 64
+FLUSH_BYTES = 1024
+FLUSH_MS = 5000
+FLUSH_POLL_MS = 250
+
+_ring = [None] * RING_SIZE
+_head = 0 # Next slot to write
+_unflushed = 0 # Newest lines not yet in LOG_FILE
+_unflushed_bytes = 0
+_unflushed_since = 0 # ticks_ms of the oldest unwritten line
+_file_size = -1 # Tracked size of LOG_FILE, -1 until first stat
+_readers = 0 # iter_lines() calls with the log files open
+
+def _rotate():
+    global _file_size
+    if _readers:
+        return # Not under an open reader; the next flush rotates
+    if _file_size < 0:
+        try: _file_size = os.stat(LOG_FILE)[6]
+        except OSError: _file_size = 0
+    if _file_size > MAX_SIZE:
+        try: os.remove(BACKUP_FILE)
+        except OSError: pass
+        try: os.rename(LOG_FILE, BACKUP_FILE)
+        except OSError: pass
+        _file_size = 0
+
+def flush():
+    # Appends the unwritten lines in one open/write
+    global _unflushed, _unflushed_bytes, _file_size
+    if not _unflushed:
+        return
     try:
-        rotate()
-        t = time.localtime()
-        ts = "{:02d}:{:02d}:{:02d}".format(t[3], t[4], t[5])
-        log_line = f"[{ts}] {level}: {message}\n"
-        print(log_line.strip()) # Print to serial console too
-        
+        _rotate()
+        start = (_head - _unflushed) % RING_SIZE
         with open(LOG_FILE, "a") as f:
-            f.write(log_line)
+            for n in range(_unflushed):
+                f.write(_ring[(start + n) % RING_SIZE])
+        _file_size += _unflushed_bytes
     except Exception as e:
         print(f"Logging Failed: {e}")
+    _unflushed = 0
+    _unflushed_bytes = 0
+
+async def flush_task():
+    while True:
+        await uasyncio.sleep_ms(FLUSH_POLL_MS)
+        if _unflushed and (_unflushed_bytes >= FLUSH_BYTES or
+                time.ticks_diff(time.ticks_ms(), _unflushed_since) >= FLUSH_MS):  # type: ignore
+            flush()
+
+def write(lvl, name, message):
+    global _head, _unflushed, _unflushed_bytes, _unflushed_since
+    if lvl < level:
+        return
+    t = time.localtime()
+    log_line = "[{:02d}:{:02d}:{:02d}] {}: {}\n".format(t[3], t[4], t[5], name, message)
+    print(log_line[:-1]) # Print to serial console too
+
+    if _unflushed == RING_SIZE:
+        flush() # flush_task fell behind; don't overwrite unwritten lines
+    _ring[_head] = log_line
+    _head = (_head + 1) % RING_SIZE
+    if not _unflushed:
+        _unflushed_since = time.ticks_ms()  # type: ignore
+    _unflushed += 1
+    _unflushed_bytes += len(log_line.encode()) # Bytes on disk, not chars
 
 def info(msg):
-    write("INFO", msg)
+    write(INFO, "INFO", msg)
 
 def error(msg):
-    write("ERROR", msg)
+    write(ERROR, "ERROR", msg)
 
 def debug(msg):
-    # Only if needed, maybe filter
-    write("DEBUG", msg)
+    write(DEBUG, "DEBUG", msg)
 
-def get_logs():
+def iter_lines():
+    # Every stored line, oldest first, holding one line in RAM at a time.
+    # Rotation waits while this runs, so the files stay put under it.
+    global _readers
+    flush()
+    _readers += 1
     try:
-        logs = ""
-        if os.path.exists(BACKUP_FILE):
-            with open(BACKUP_FILE, "r") as f:
-                logs += f.read()
-        if os.path.exists(LOG_FILE):
-            with open(LOG_FILE, "r") as f:
-                logs += f.read()
-        return logs
-    except:
-        return "Error reading logs"
+        for path in (BACKUP_FILE, LOG_FILE):
+            try:
+                f = open(path, "r")
+            except OSError:
+                continue
+            with f:
+                while True:
+                    line = f.readline()
+                    if not line:
+                        break
+                    yield line
+    finally:
+        _readers -= 1
+
+def select(offset=0, limit=-1, tail=0, since=None):
+    # Yields (n, line) for stored lines, n counting from the oldest. since
+    # ("HH:MM:SS") keeps lines stamped at or after it, tail keeps the last
+    # `tail` of those, then offset/limit page through what is left.
+    if tail > 0:
+        total = 0
+        for line in iter_lines():
+            if not since or line[1:9] >= since:
+                total += 1
+        offset += max(0, total - tail)
+    skipped = 0
+    sent = 0
+    n = -1
+    for line in iter_lines():
+        n += 1
+        if since and line[1:9] < since:
+            continue
+        if skipped < offset:
+            skipped += 1
+            continue
+        if sent == limit:
+            return
+        sent += 1
+        yield n, line
 
 def clear():
-    try:
-        os.remove(LOG_FILE)
-        os.remove(BACKUP_FILE)
-    except:
-        pass
+    global _unflushed, _unflushed_bytes, _file_size
+    _unflushed = 0
+    _unflushed_bytes = 0
+    _file_size = 0
+    for path in (LOG_FILE, BACKUP_FILE):
+        try: os.remove(path)
+        except OSError: pass
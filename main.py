@@ -11,6 +11,9 @@ import time
 import config
 import sd_manager
 import logger
+import frame_pool
+import image_store
+import config_store
 
 # --- Hardware Setup (Relocated for SD Card) ---
 # SCK=4, MOSI=5, CS=6, DC=7, BUSY=16
@@ -21,6 +24,9 @@ busy = machine.Pin(16, machine.Pin.IN)
 
 epd = il3820.EPD(spi, cs, dc, busy, rst=None)
 
+# Allocate display frame buffers before the heap fragments
+frame_pool.init()
+
 def get_local_time():
     now = time.time() + config.UTC_OFFSET
     tm = time.localtime(now)
@@ -40,7 +46,7 @@ async def weather_task():
     while True:
         await uasyncio.sleep(900) 
         led_manager.led_web_request()
-        weather_api.update()
+        await weather_api.update()
         led_manager.led_off()
         gc.collect()
 
@@ -74,28 +80,34 @@ async def ui_task():
             if time_changed: led_manager.led_minute_update()
             if msg_changed: led_manager.led_web_request()
             
-            display_ui.draw_screen(epd, t_str, d_str, msg_str, partial=partial)
+            await display_ui.draw_screen_async(epd, t_str, d_str, msg_str, partial=partial)
             led_manager.led_off()
             
             last_time_str = t_str
             last_msg_str = msg_str
-            gc.collect()
         
         await uasyncio.sleep(0.1)
 
 async def main_loop():
     logger.info("Init System...")
+
+    # LED status animations run from here on
+    uasyncio.create_task(led_manager.animator_task())
+    uasyncio.create_task(logger.flush_task())
+    uasyncio.create_task(wifi_manager.scan_task())
     
     # Init SD Card
-    if sd_manager.mount_sd():
+    sd_mounted = sd_manager.mount_sd()
+    if sd_mounted:
         logger.info("SD Mounted")
     else:
         logger.info("SD Mount Failed (Skipping)")
+    image_store.init(sd_mounted)
     
-    epd.init()
+    await epd.init_async()
 
     # Initial Connection
-    if wifi_manager.connect():
+    if await wifi_manager.connect():
         led_manager.led_syncing()
         import ntptime
         try: 
@@ -104,7 +116,7 @@ async def main_loop():
         except: 
             logger.error("Time Sync Failed")
         
-        weather_api.update()
+        await weather_api.update()
         led_manager.led_off()
     else:
         # AP Mode started
@@ -127,9 +139,13 @@ def main():
     try:
         uasyncio.run(main_loop())
     except KeyboardInterrupt:
+        config_store.flush_now()
+        logger.flush()
         print("Stopped")
     except Exception as e:
+        config_store.flush_now()
         logger.error(f"CRASH: {e}")
+        logger.flush()
         # Log traceback if possible?
         # sys.print_exception(e) # to stdout
         # We can't easily capture full traceback to string in MicroPython without io.StringIO
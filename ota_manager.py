@@ -4,71 +4,102 @@ import gc
 import ubinascii
 import hashlib
 import hmac
+import config_store
 
 KEYS_DIR = "/keys"
 LEGACY_KEY = "secret.key"
+STAGING_FILE = "/update.zip"
 
-def verify_signature(zip_data, signature):
-    # 1. Try Keys Directory
+# Upload chunk size; peak heap use during an update does not depend on
+# the package size
+CHUNK_SIZE = 1024
+
+# hmac.Key per trusted key, so repeated uploads skip the key setup
+_contexts = {}
+
+def key_context(key):
+    ctx = _contexts.get(key)
+    if ctx is None:
+        ctx = hmac.Key(key, hashlib.sha256)
+        _contexts[key] = ctx
+    return ctx
+
+def load_keys():
+    # Returns [(name, key_bytes)] for every trusted key
+    keys = []
+    # 1. Keys Directory
     try:
-        key_files = uos.listdir(KEYS_DIR)
-        for kf in key_files:
+        for kf in uos.listdir(KEYS_DIR):
             try:
                 with open(f"{KEYS_DIR}/{kf}", "r") as f:
-                    key_hex = f.read().strip()
-                    key = ubinascii.unhexlify(key_hex)
-                
-                calc_sig = hmac.new(key, zip_data, hashlib.sha256).digest()
-                if calc_sig == signature:
-                    print(f"Signature Validated by {kf}")
-                    return True
+                    keys.append((kf, ubinascii.unhexlify(f.read().strip())))
             except Exception as e:
                 print(f"Key Error {kf}: {e}")
     except OSError:
         pass # Dir doesn't exist
 
-    # 2. Try Legacy Key
+    # 2. Legacy Key
     try:
         with open(LEGACY_KEY, "r") as f:
-            key_hex = f.read().strip()
-            key = ubinascii.unhexlify(key_hex)
-        
-        calc_sig = hmac.new(key, zip_data, hashlib.sha256).digest()
-        if calc_sig == signature:
-            print("Signature Validated by Legacy Key")
-            return True
+            keys.append(("Legacy Key", ubinascii.unhexlify(f.read().strip())))
     except:
         pass
-        
-    return False
+    return keys
 
-def verify_and_install(zip_data, signature):
-    print("Verifying signature (HMAC-SHA256)...")
-    
-    if not verify_signature(zip_data, signature):
-        print("Verification Failed: No matching key found.")
+async def receive_update(stream, length, signature):
+    # Streams `length` bytes from `stream` to STAGING_FILE while updating
+    # one HMAC-SHA256 per trusted key. Returns True if any key matches.
+    print("Receiving update (HMAC-SHA256)...")
+    verifiers = []
+    for name, key in load_keys():
+        verifiers.append((name, key_context(key).new()))
+    if not verifiers:
+        print("Verification Failed: No keys installed.")
         return False
 
-    print("Writing update.zip...")
-    with open("/update.zip", "wb") as f:
-        f.write(zip_data)
-    
+    remaining = length
+    with open(STAGING_FILE, "wb") as f:
+        while remaining > 0:
+            chunk = await stream.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            for _, mac in verifiers:
+                mac.update(chunk)
+            f.write(chunk)
+            remaining -= len(chunk)
+
+    if remaining:
+        print(f"Upload Incomplete: {remaining} bytes missing")
+    else:
+        for name, mac in verifiers:
+            if mac.digest() == signature:
+                print(f"Signature Validated by {name}")
+                return True
+        print("Verification Failed: No matching key found.")
+
+    try: uos.remove(STAGING_FILE)
+    except OSError: pass
+    return False
+
+def install():
     print("Unpacking...")
     import unzip
     try:
-        unzip.extract("/update.zip", "/")
+        unzip.extract(STAGING_FILE, "/")
     except Exception as e:
         print(f"Unzip Failed: {e}")
         return False
+    gc.collect()
     
     print("Update Installed. Rebooting...")
     import uasyncio
     async def reboot_later():
         await uasyncio.sleep(5)
+        config_store.flush_now()
         machine.reset()
     try:
         uasyncio.create_task(reboot_later())
     except:
         machine.reset()
         
-    return True
\ No newline at end of file
+    return True
@@ -0,0 +1,52 @@
+import os
+import time
+import ubinascii
+
+# Login sessions: token -> time.time() deadline in seconds. Using a token
+# pushes its deadline out again, so the earliest deadline is also the least
+# recently used session, which is the one dropped when the table is full.
+# Seconds rather than ticks_ms, which wraps every ~12.4 days and would let
+# a token idle for long enough look unexpired again. NTP sets the clock at
+# boot before the web server starts, so it does not jump under sessions.
+CAPACITY = 8
+TTL_S = 12 * 60 * 60
+
+_sessions = {}
+
+def _purge(now):
+    for token in [t for t, d in _sessions.items() if d <= now]:
+        del _sessions[token]
+
+def create():
+    now = time.time()
+    _purge(now)
+    if len(_sessions) >= CAPACITY:
+        oldest = None
+        for token, deadline in _sessions.items():
+            if oldest is None or deadline < _sessions[oldest]:
+                oldest = token
+        del _sessions[oldest]
+    token = ubinascii.hexlify(os.urandom(16)).decode()
+    _sessions[token] = now + TTL_S
+    return token
+
+def validate(token):
+    # Checked on every API request: one dict lookup, no allocation
+    deadline = _sessions.get(token)
+    if deadline is None:
+        return False
+    now = time.time()
+    if deadline <= now:
+        del _sessions[token]
+        return False
+    _sessions[token] = now + TTL_S
+    return True
+
+def revoke(token):
+    return _sessions.pop(token, None) is not None
+
+def clear():
+    _sessions.clear()
+
+def count():
+    return len(_sessions)
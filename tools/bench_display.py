@@ -0,0 +1,64 @@
+# Clock render benchmark. Runs on the device:
+#   mpremote connect /dev/esp32 run tools/bench_display.py
+# or on the host against the simulator shims:
+#   python tools/bench_display.py
+import sys
+if sys.implementation.name != "micropython":
+    import os
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "sim"))
+    import host
+    host.install()
+
+import time
+import frame_pool
+import display_ui
+
+RUNS = 50
+TEXT = "12:34"
+X, Y, SCALE = 19, 40, 3
+
+def legacy_big_text(fb, text, x, y, scale=3):
+    # The per-pixel fill_rect renderer draw_big_text used before sprites
+    cursor_x = x
+    for char in text:
+        pattern = display_ui.BIG_DIGITS.get(char)
+        if pattern:
+            for row_idx, row_val in enumerate(pattern):
+                for col_idx in range(5):
+                    if (row_val >> (4 - col_idx)) & 1:
+                        fb.fill_rect(cursor_x + col_idx * scale, y + row_idx * scale, scale, scale, 0x00)
+        cursor_x += (6 * scale)
+
+def bench(name, func, fb):
+    t0 = time.ticks_us()
+    for _ in range(RUNS):
+        func(fb, TEXT, X, Y, SCALE)
+    dt = time.ticks_diff(time.ticks_us(), t0)
+    print(f"{name}: {dt // RUNS} us per clock")
+    return dt
+
+def main():
+    if sys.implementation.name != "micropython":
+        print("Host run: framebuf is the Python shim, only the output check is meaningful")
+    buf, fb = frame_pool.borrow()
+    try:
+        fb.fill(0xFF)
+        legacy_big_text(fb, TEXT, X, Y, SCALE)
+        expected = bytes(buf)
+        fb.fill(0xFF)
+        display_ui.draw_big_text(fb, TEXT, X, Y, SCALE)
+        print("Output identical:", bytes(buf) == expected)
+
+        # First sprite call for a scale pays for pre-rendering
+        display_ui._sprites.clear()
+        t0 = time.ticks_us()
+        display_ui.build_sprites(SCALE)
+        print(f"Sprite build (once): {time.ticks_diff(time.ticks_us(), t0)} us")
+
+        before = bench("fill_rect per pixel", legacy_big_text, fb)
+        after = bench("sprite blit", display_ui.draw_big_text, fb)
+        print(f"Speedup: {before / after:.1f}x")
+    finally:
+        frame_pool.release()
+
+main()
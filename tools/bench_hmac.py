@@ -0,0 +1,119 @@
+# HMAC equivalence checks and throughput benchmark. Runs on the device
+# (against the hmac.py installed there):
+#   mpremote connect /dev/esp32 run tools/bench_hmac.py
+# or on the host, where the repo's hmac.py is also checked against CPython's:
+#   python tools/bench_hmac.py
+import sys
+import time
+import hashlib
+
+if sys.implementation.name == "micropython":
+    import hmac as device_hmac
+    ref_hmac = None
+    def ticks_us(): return time.ticks_us()  # type: ignore
+    def ticks_diff(a, b): return time.ticks_diff(a, b)  # type: ignore
+else:
+    import os
+    import importlib.util
+    import hmac as ref_hmac
+    # Load the device module under another name; "hmac" is CPython's here
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "hmac.py")
+    spec = importlib.util.spec_from_file_location("device_hmac", path)
+    device_hmac = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(device_hmac)
+    def ticks_us(): return time.perf_counter_ns() // 1000
+    def ticks_diff(a, b): return a - b
+
+# RFC 4231 HMAC-SHA256 test cases 1, 2, 6 and 7 (key longer than a block)
+VECTORS = (
+    (b"\x0b" * 20, b"Hi There",
+     "b0344c61d8db38535ca8afceaf0bf12b881dc200c9833da726e9376c2e32cff7"),
+    (b"Jefe", b"what do ya want for nothing?",
+     "5bdcc146bf60754e6a042426089575c75a003f089d2739839dec58b964ec3843"),
+    (b"\xaa" * 131, b"Test Using Larger Than Block-Size Key - Hash Key First",
+     "60e431591ee0b67f0d8a26aacbf5b77f8e0bc6213728c5140546040f0ee37f54"),
+    (b"\xaa" * 131, b"This is a test using a larger than block-size key and a larger than "
+     b"block-size data. The key needs to be hashed before being used by the HMAC algorithm.",
+     "9b09ffa71b942fcb27635fbcd5b0e944bfdc63644f0713938a7f51535c3a35e2"),
+)
+
+failures = 0
+
+def check(label, got, expected):
+    global failures
+    if got != expected:
+        failures += 1
+        print(f"FAIL {label}: {got} != {expected}")
+
+def check_vectors():
+    for n, (key, msg, expected) in enumerate(VECTORS):
+        check(f"vector {n} new", device_hmac.new(key, msg, hashlib.sha256).hexdigest(), expected)
+        mac = device_hmac.Key(key).new()
+        for i in range(0, len(msg), 7):
+            mac.update(msg[i:i + 7])
+        check(f"vector {n} chunked", mac.hexdigest(), expected)
+
+def check_reference():
+    # Key lengths around the block size, split messages, and digest()
+    # followed by more update() calls (host hashes support copy())
+    import random
+    rng = random.Random(1)
+    for key_len in (0, 1, 32, 63, 64, 65, 200):
+        key = bytes(rng.getrandbits(8) for _ in range(key_len))
+        ctx = device_hmac.Key(key)
+        for msg_len in (0, 1, 55, 64, 1000):
+            msg = bytes(rng.getrandbits(8) for _ in range(msg_len))
+            expected = ref_hmac.new(key, msg, hashlib.sha256)
+            label = f"key {key_len} msg {msg_len}"
+            check(label, device_hmac.new(key, msg).digest(), expected.digest())
+            mac = ctx.new(msg[:msg_len // 2])
+            mac.update(msg[msg_len // 2:])
+            check(label + " split", mac.hexdigest(), expected.hexdigest())
+            mac.update(b"more")
+            expected.update(b"more")
+            check(label + " resumed", mac.digest(), expected.digest())
+    check("sha1", device_hmac.new(b"k", b"m", hashlib.sha1).digest(),
+          ref_hmac.new(b"k", b"m", hashlib.sha1).digest())
+
+def rate(label, count, nbytes, elapsed_us):
+    elapsed_us = max(elapsed_us, 1)
+    kbps = nbytes * 1000 // elapsed_us  # bytes per ms ~= KB/s
+    print(f"{label:28} {elapsed_us // count:6} us/op  {kbps:8} KB/s")
+
+def bench():
+    key = b"\x5a" * 32
+    small = b"x" * 64
+    chunk = b"y" * 1024
+    runs = 200
+
+    t0 = ticks_us()
+    for _ in range(runs):
+        device_hmac.new(key, small, hashlib.sha256).digest()
+    rate("new() per message", runs, runs * len(small), ticks_diff(ticks_us(), t0))
+
+    ctx = device_hmac.Key(key)
+    t0 = ticks_us()
+    for _ in range(runs):
+        ctx.new(small).digest()
+    rate("Key.new() per message", runs, runs * len(small), ticks_diff(ticks_us(), t0))
+
+    mac = ctx.new()
+    t0 = ticks_us()
+    for _ in range(runs):
+        mac.update(chunk)
+    mac.digest()
+    rate("streamed 1 KB chunks", runs, runs * len(chunk), ticks_diff(ticks_us(), t0))
+
+    if ref_hmac:
+        t0 = ticks_us()
+        for _ in range(runs):
+            ref_hmac.new(key, small, hashlib.sha256).digest()
+        rate("CPython hmac per message", runs, runs * len(small), ticks_diff(ticks_us(), t0))
+
+check_vectors()
+if ref_hmac:
+    check_reference()
+print("Equivalence: " + ("OK" if not failures else f"{failures} failures"))
+bench()
+if failures:
+    sys.exit(1)
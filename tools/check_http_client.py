@@ -0,0 +1,267 @@
+# Exercises http_client and weather_api.update() against a local stand-in
+# for the Open-Meteo server (host only):
+#   python tools/check_http_client.py
+#
+# Covers split writes, 5xx retries with backoff, timeouts, 404s, a stall
+# mid-body, that a ticker task keeps running during a slow fetch, and
+# keep-alive reuse, idle connections being closed, chunked bodies, ETag
+# revalidation and the DNS cache.
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "sim"))
+
+import host  # noqa: E402
+
+host.install()
+
+import http_client  # noqa: E402
+import weather_api  # noqa: E402
+
+DOC = {
+    "current_weather_units": {"temperature": "°C"},
+    "current_weather": {"temperature": 17.25, "windspeed": 5.0, "weathercode": 61},
+    "daily": {
+        "time": ["2026-10-18", "2026-10-19", "2026-10-20", "2026-10-21"],
+        "temperature_2m_max": [19.5, 18.0, 16.25, 15.0],
+        "temperature_2m_min": [11.0, 9.5, 8.75, 7.0],
+    },
+}
+BODY = json.dumps(DOC, ensure_ascii=False).encode()
+
+# Per-request behaviours, consumed in order by the stand-in server
+script = []
+requests = []
+connections = 0
+closed = 0
+ETAG = '"w1"'
+
+
+async def respond(writer, mode, headers):
+    if mode == "stall":
+        await asyncio.sleep(5)
+        return False
+    if mode in ("503", "404"):
+        writer.write(f"HTTP/1.0 {mode} X\r\nContent-Length: 0\r\n\r\n".encode())
+        return False
+    if mode == "keepalive":
+        if headers.get("if-none-match") == ETAG:
+            writer.write(f"HTTP/1.1 304 Not Modified\r\nETag: {ETAG}\r\n\r\n".encode())
+            return True
+        response = (f"HTTP/1.1 200 OK\r\nContent-Length: {len(BODY)}\r\nETag: {ETAG}\r\n\r\n").encode() + BODY
+    elif mode == "chunked":
+        parts = [BODY[i:i + 100] for i in range(0, len(BODY), 100)]
+        response = b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n"
+        response += b"".join(b"%x;ext=1\r\n%s\r\n" % (len(p), p) for p in parts) + b"0\r\nX-Trailer: 1\r\n\r\n"
+    else:
+        response = b"HTTP/1.0 200 OK\r\nContent-Type: application/json\r\n\r\n" + BODY
+        if mode == "stall-body":
+            response = response[:len(response) // 2]
+    # Dribble it out in small pieces to split tokens across reads
+    for i in range(0, len(response), 37):
+        writer.write(response[i:i + 37])
+        await writer.drain()
+        await asyncio.sleep(0.001)
+    if mode == "stall-body":
+        await asyncio.sleep(5)
+    return mode in ("keepalive", "chunked")
+
+
+async def handle(reader, writer):
+    global connections, closed
+    connections += 1
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            requests.append(line.decode().strip())
+            headers = {}
+            while True:
+                h = await reader.readline()
+                if h in (b"\r\n", b""):
+                    break
+                name, _, value = h.decode().partition(":")
+                headers[name.strip().lower()] = value.strip()
+            mode = script.pop(0) if script else "ok"
+            keep = await respond(writer, mode, headers)
+            await writer.drain()
+            if not keep:
+                break
+    finally:
+        closed += 1
+        writer.close()
+
+
+failures = 0
+
+
+def check(label, ok):
+    global failures
+    print(f"{'ok  ' if ok else 'FAIL'} {label}")
+    if not ok:
+        failures += 1
+
+
+async def fetch(url, **kw):
+    out = bytearray()
+    status = await http_client.get(url, out.extend, **kw)
+    return status, bytes(out)
+
+
+async def main():
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    base = f"http://127.0.0.1:{port}"
+    http_client.TIMEOUT_MS = 300
+    http_client.BACKOFF_MS = 50
+
+    check("split_url", http_client.split_url("http://a.b:8080/x?y=1") == ("a.b", 8080, "/x?y=1")
+          and http_client.split_url("http://a.b") == ("a.b", 80, "/"))
+
+    status, body = await fetch(base + "/v1/forecast?x=1")
+    check("200 body streamed intact", status == 200 and body == BODY)
+    check("request line", requests[-1] == "GET /v1/forecast?x=1 HTTP/1.1")
+
+    script[:] = ["503", "503", "ok"]
+    del requests[:]
+    t0 = time.monotonic()
+    status, body = await fetch(base + "/")
+    waited = time.monotonic() - t0
+    check("5xx retried with backoff", status == 200 and len(requests) == 3 and waited >= 0.15)
+
+    script[:] = ["404"]
+    del requests[:]
+    status, body = await fetch(base + "/")
+    check("404 returned without retry", status == 404 and not body and len(requests) == 1)
+
+    script[:] = ["stall", "stall", "stall"]
+    del requests[:]
+    status, _ = await fetch(base + "/")
+    check("header timeouts retried, then 0", status == 0 and len(requests) == 3)
+
+    script[:] = ["stall-body"]
+    del requests[:]
+    status, _ = await fetch(base + "/")
+    check("stall mid-body not retried", status == 0 and len(requests) == 1)
+
+    # The loop keeps running while a fetch waits on a slow server
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    task = asyncio.create_task(ticker())
+    script[:] = ["stall", "ok"]
+    status, _ = await fetch(base + "/")
+    task.cancel()
+    check(f"loop not blocked ({ticks} ticks during fetch)", status == 200 and ticks > 20)
+
+    # Keep-alive: both requests share one connection; the second is a 304
+    await http_client.close_idle(0)
+    script[:] = ["keepalive", "keepalive"]
+    before = connections
+    status, body = await fetch(base + "/ka", conditional=True)
+    status2, body2 = await fetch(base + "/ka", conditional=True)
+    check("keep-alive reuses the connection", status == 200 and body == BODY and connections - before == 1)
+    check("ETag revalidation returns 304 without a body", status2 == 304 and not body2)
+
+    # A pooled connection the server has since closed is replaced transparently
+    script[:] = ["ok"]
+    for key in list(http_client._pool):
+        http_client._pool[key][1].close()
+    status, body = await fetch(base + "/after-close")
+    check("stale pooled connection retried on a fresh one", status == 200 and body == BODY)
+
+    script[:] = ["chunked", "keepalive"]
+    before = connections
+    status, body = await fetch(base + "/chunked")
+    status2, body2 = await fetch(base + "/ka2")
+    check("chunked body decoded", status == 200 and body == BODY)
+    check("connection reused after chunked body", status2 == 200 and body2 == BODY and connections - before == 1)
+    await http_client.close_idle(0)
+
+    # Idle pooled connections are closed by the reaper, not the next request
+    http_client.IDLE_MS = 100
+    if http_client._reaper:
+        # Still sleeping out the 20 s IDLE_MS of the earlier connections
+        http_client._reaper.cancel()
+        await asyncio.sleep(0)
+    script[:] = ["keepalive"]
+    status, _ = await fetch(base + "/idle")
+    before = closed
+    pooled = len(http_client._pool)
+    await asyncio.sleep(0.4)
+    check("idle connection closed without another request",
+          status == 200 and pooled == 1 and not http_client._pool and closed - before == 1)
+    http_client.IDLE_MS = 20000
+
+    # DNS lookups are cached per host
+    lookups = []
+
+    def getaddrinfo(hostname, port):
+        lookups.append(hostname)
+        return [(2, 1, 0, "", ("127.0.0.1", port))]
+
+    real_getaddrinfo = http_client.usocket.getaddrinfo
+    http_client.usocket.getaddrinfo = getaddrinfo
+    http_client._dns.clear()
+    for _ in range(3):
+        status, _ = await fetch(f"http://weather.test:{port}/")
+    check("DNS resolved once for repeated fetches", status == 200 and lookups == ["weather.test"])
+
+    # An expired entry whose lookup fails falls back to the last address
+    def failing_getaddrinfo(hostname, port):
+        lookups.append(hostname)
+        raise OSError("no DNS")
+
+    http_client.usocket.getaddrinfo = failing_getaddrinfo
+    http_client.forget("weather.test")
+    del lookups[:]
+    status, body = await fetch(f"http://weather.test:{port}/")
+    http_client.usocket.getaddrinfo = real_getaddrinfo
+    check("failed lookup falls back to the last known address",
+          status == 200 and body == BODY and lookups == ["weather.test"])
+
+    # With nothing cached, a failed lookup is not retried within the get()
+    http_client.usocket.getaddrinfo = failing_getaddrinfo
+    del lookups[:]
+    t0 = time.monotonic()
+    status, _ = await fetch(f"http://other.test:{port}/")
+    waited = time.monotonic() - t0
+    http_client.usocket.getaddrinfo = real_getaddrinfo
+    check("failed lookup not retried", status == 0 and lookups == ["other.test"] and waited < 0.05)
+
+    # weather_api.update() end to end
+    weather_api.config.LAT = 0
+    weather_api.config.LON = 0
+    url = None
+    real_get = http_client.get
+
+    async def local_get(u, sink, **kw):
+        nonlocal url
+        url = u
+        return await real_get(base + u[u.index("/v1"):], sink, **kw)
+
+    http_client.get = local_get
+    weather_api.cache["last_update"] = 0
+    await weather_api.update()
+    http_client.get = real_get
+    cache = weather_api.cache
+    check("weather_api.update fills the cache",
+          cache["temp"] == 17.25 and cache["desc"] == "雨"
+          and cache["forecast"] == [("10-18", 19.5, 11.0), ("10-19", 18.0, 9.5), ("10-20", 16.25, 8.75)])
+
+    server.close()
+    await server.wait_closed()
+
+
+asyncio.run(main())
+print("All passed" if not failures else f"{failures} failed")
+sys.exit(1 if failures else 0)
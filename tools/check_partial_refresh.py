@@ -0,0 +1,112 @@
+# Checks partial display refreshes against the simulated panel (host only):
+#   python tools/check_partial_refresh.py
+#
+# Draws a full frame and then a minute tick through display_ui.draw_screen
+# on epd_sim.SimEPD, and checks that the tick writes exactly the dirty
+# row bands to panel RAM (not the whole 4736-byte frame), once per RAM
+# bank, that both banks then match a full render of the new frame, that
+# an unchanged tick sends nothing, and that a send failing part way is
+# followed by a full frame.
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "sim"))
+
+import host  # noqa: E402
+
+host.install()
+
+import epd_sim  # noqa: E402
+import display_ui  # noqa: E402
+import frame_pool  # noqa: E402
+import weather_api  # noqa: E402
+import wifi_manager  # noqa: E402
+
+DATE = "2026-10-18"
+RUNS = 50
+
+failures = 0
+
+
+def check(label, ok):
+    global failures
+    print(f"{'ok  ' if ok else 'FAIL'} {label}")
+    if not ok:
+        failures += 1
+
+
+def main():
+    weather_api.cache.update({
+        "temp": 21.5,
+        "desc": "多云",
+        "forecast": [("10-18", 23.1, 12.4), ("10-19", 20.0, 11.2), ("10-20", 18.7, 9.9)],
+        "last_update": 1,
+    })
+    wifi_manager.ip_address = "192.168.4.1"
+
+    epd = epd_sim.SimEPD()
+    epd.init()
+
+    epd.stats.reset()
+    display_ui.draw_screen(epd, "12:34", DATE)
+    full = epd.stats.ram_bytes
+    check(f"full frame sends the whole frame to both banks ({full} RAM bytes)",
+          full == 2 * frame_pool.FRAME_SIZE)
+    old = bytes(frame_pool.front())
+
+    epd.stats.reset()
+    display_ui.draw_screen(epd, "12:35", DATE, partial=True)
+    new = bytes(frame_pool.front())
+    bands = display_ui.find_dirty_bands(new, old)
+    area = sum((y1 - y0 + 1) * display_ui.ROW_BYTES for y0, y1 in bands)
+    sent = epd.stats.ram_bytes
+    check(f"minute tick sends only the dirty bands ({sent} RAM bytes, {len(bands)} bands)",
+          bands and sent == 2 * area and sent < full)
+
+    epd.panel.flush()
+    check("both RAM banks match the new frame", all(bytes(bank) == new for bank in epd.panel.banks))
+
+    reference = epd_sim.SimEPD()
+    reference.init()
+    frame_pool.invalidate()
+    display_ui.draw_screen(reference, "12:35", DATE)
+    reference.panel.flush()
+    check("partial result equals a full render", bytes(reference.panel.ram) == bytes(epd.panel.ram))
+
+    epd.stats.reset()
+    display_ui.draw_screen(epd, "12:35", DATE, partial=True)
+    check("unchanged tick sends nothing", epd.stats.ram_bytes == 0 and epd.stats.refreshes == 0)
+
+    # A send that fails part way leaves panel RAM unknown: the next tick
+    # must push the whole frame rather than a diff
+    real_rows = epd.set_frame_rows
+
+    def failing_rows(image, *band):
+        real_rows(image, *band)
+        raise OSError("SPI error")
+
+    epd.set_frame_rows = failing_rows
+    try:
+        display_ui.draw_screen(epd, "12:36", DATE, partial=True)
+    except OSError:
+        pass
+    epd.set_frame_rows = real_rows
+    check("failed send invalidates the front buffer", frame_pool.front() is None)
+    epd.stats.reset()
+    display_ui.draw_screen(epd, "12:36", DATE, partial=True)
+    epd.panel.flush()
+    check("next tick sends the whole frame",
+          epd.stats.ram_bytes == 2 * frame_pool.FRAME_SIZE
+          and all(bytes(bank) == bytes(frame_pool.front()) for bank in epd.panel.banks))
+
+    t0 = time.perf_counter()
+    for _ in range(RUNS):
+        display_ui.find_dirty_bands(new, old)
+    print(f"find_dirty_bands: {(time.perf_counter() - t0) * 1e6 / RUNS:.0f} us per tick (host)")
+
+    print("All passed" if not failures else f"{failures} failed")
+    sys.exit(1 if failures else 0)
+
+
+main()
@@ -1,5 +1,6 @@
 import requests
 import sign # Our sign.py module
+import precompress
 import sys
 import os
 import subprocess
@@ -38,6 +39,7 @@ def build_project():
     # 4. Copy WWW
     if os.path.exists("www"):
         shutil.copytree("www", os.path.join(BUILD_DIR, "www"))
+        precompress.precompress(os.path.join(BUILD_DIR, "www"))
         
     # 5. Compile Fonts
     print("  Compiling Fonts...")
@@ -85,11 +87,8 @@ def deploy(ip):
     
     with open(sig_path, "rb") as f:
         sig_bytes = f.read()
-    
-    with open(zip_path, "rb") as f:
-        zip_data = f.read()
         
-    size_kb = len(zip_data) / 1024
+    size_kb = os.path.getsize(zip_path) / 1024
     print(f"Uploading {size_kb:.1f} KB to http://{ip}/api/ota...")
     
     headers = {
@@ -99,7 +98,9 @@ def deploy(ip):
     }
     
     try:
-        r = requests.post(f"http://{ip}/api/ota", data=zip_data, headers=headers)
+        # Stream the file; the device writes it to flash as it arrives
+        with open(zip_path, "rb") as f:
+            r = requests.post(f"http://{ip}/api/ota", data=f, headers=headers)
         if r.status_code == 200:
             print("Success! Device is updating.")
         else:
@@ -0,0 +1,49 @@
+# Gzips the frontend build and writes a content-hash manifest for the
+# device's static file routes (web_server.serve_static):
+#   python tools/precompress.py build/www
+#
+# For every file the manifest records an ETag (truncated SHA-256 of the
+# original bytes) and whether a smaller <file>.gz sits next to it.
+import gzip
+import hashlib
+import json
+import os
+import sys
+
+MANIFEST = "etags.json"
+COMPRESSIBLE = (".html", ".js", ".css", ".svg", ".json", ".txt", ".ico", ".map")
+MIN_SIZE = 256 # Below this the gzip header eats the savings
+ETAG_LEN = 16
+
+def precompress(www_dir):
+    manifest = {}
+    before = after = 0
+    for root, dirs, files in os.walk(www_dir):
+        dirs.sort()
+        for name in sorted(files):
+            if name == MANIFEST or name.endswith(".gz"):
+                continue
+            path = os.path.join(root, name)
+            rel = os.path.relpath(path, www_dir).replace(os.sep, "/")
+            with open(path, "rb") as f:
+                data = f.read()
+            entry = {"etag": hashlib.sha256(data).hexdigest()[:ETAG_LEN]}
+            size = len(data)
+            if name.endswith(COMPRESSIBLE) and len(data) >= MIN_SIZE:
+                # mtime=0 keeps the output reproducible between builds
+                packed = gzip.compress(data, compresslevel=9, mtime=0)
+                if len(packed) < len(data):
+                    with open(path + ".gz", "wb") as f:
+                        f.write(packed)
+                    entry["gz"] = True
+                    size = len(packed)
+            manifest[rel] = entry
+            before += len(data)
+            after += size
+    with open(os.path.join(www_dir, MANIFEST), "w") as f:
+        json.dump(manifest, f, separators=(",", ":"), sort_keys=True)
+    print(f"  Precompressed {len(manifest)} files: {before / 1024:.1f} KB -> {after / 1024:.1f} KB served")
+    return manifest
+
+if __name__ == "__main__":
+    precompress(sys.argv[1] if len(sys.argv) > 1 else "www")
@@ -0,0 +1,105 @@
+# Renders display_ui screens on the host against the simulated panel.
+#
+#   python tools/render_sim.py                      # full frame + one partial tick
+#   python tools/render_sim.py --out frame.png --scale 3
+#
+# Golden-image check: the final panel RAM after the default full frame and
+# partial tick must match tools/golden/clock.png pixel for pixel. Exits 1
+# on a mismatch or a missing golden:
+#   python tools/render_sim.py --golden tools/golden/clock.png
+# After an intended rendering change, regenerate and commit it:
+#   python tools/render_sim.py --golden tools/golden/clock.png --update-golden
+#
+# Prints host timing and SPI byte counts per frame. Text glyphs are only
+# approximate (see sim/framebuf.py), and golden runs always use the box
+# glyphs for CJK text, so goldens are for host regressions.
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "sim"))
+
+import host  # noqa: E402
+
+# Golden runs must not depend on a locally compiled font_zh.py
+host.install(sim_font="--golden" in sys.argv)
+
+import epd_sim  # noqa: E402
+import display_ui  # noqa: E402
+import weather_api  # noqa: E402
+import wifi_manager  # noqa: E402
+
+SAMPLE_WEATHER = {
+    "temp": 21.5,
+    "desc": "多云",
+    "forecast": [("10-18", 23.1, 12.4), ("10-19", 20.0, 11.2), ("10-20", 18.7, 9.9)],
+    "last_update": 1,
+}
+
+
+def draw(epd, label, time_str, date_str, message, partial, runs):
+    epd.stats.reset()
+    t0 = time.perf_counter()
+    display_ui.draw_screen(epd, time_str, date_str, message, partial=partial)
+    elapsed = (time.perf_counter() - t0) * 1000
+    stats = epd.stats.summary()
+    # Repeat for timing only; identical frames send nothing on partial ticks
+    if runs > 1:
+        t0 = time.perf_counter()
+        for _ in range(runs):
+            display_ui.render_screen(epd, time_str, date_str, message, partial=False)
+        elapsed = (time.perf_counter() - t0) * 1000 / runs
+    print(f"{label:8} {elapsed:8.1f} ms  {stats}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render display_ui on a simulated IL3820")
+    parser.add_argument("--time", default="12:34")
+    parser.add_argument("--next", default="12:35", help="time for the partial tick ('' to skip)")
+    parser.add_argument("--date", default="2026-10-18")
+    parser.add_argument("--message", default="")
+    parser.add_argument("--ip", default="192.168.4.1")
+    parser.add_argument("--runs", type=int, default=1, help="repeat renders for timing")
+    parser.add_argument("--out", default="sim_frame.png")
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--golden", help="PNG to compare the final panel RAM against")
+    parser.add_argument("--update-golden", action="store_true")
+    args = parser.parse_args()
+
+    weather_api.cache.update(SAMPLE_WEATHER)
+    wifi_manager.ip_address = args.ip
+
+    epd = epd_sim.SimEPD()
+    epd.stats.reset()
+    t0 = time.perf_counter()
+    epd.init()
+    print(f"{'init':8} {(time.perf_counter() - t0) * 1000:8.1f} ms  {epd.stats.summary()}")
+
+    draw(epd, "full", args.time, args.date, args.message, False, args.runs)
+    if args.next:
+        draw(epd, "partial", args.next, args.date, args.message, True, 1)
+
+    epd.panel.save_png(args.out, args.scale)
+    print(f"Saved {args.out}")
+
+    if args.golden:
+        if args.update_golden:
+            epd.panel.save_png(args.golden)
+            print(f"Wrote golden {args.golden}")
+            return 0
+        if not os.path.exists(args.golden):
+            print(f"MISSING golden {args.golden} (create it with --update-golden)")
+            return 1
+        from PIL import Image, ImageChops
+        expected = Image.open(args.golden).convert("1")
+        bbox = ImageChops.difference(expected.convert("L"), epd.panel.to_image().convert("L")).getbbox()
+        if bbox:
+            print(f"MISMATCH against {args.golden} in region {bbox}")
+            return 1
+        print(f"Matches {args.golden}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
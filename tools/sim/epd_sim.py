@@ -0,0 +1,180 @@
+# Fake IL3820 panel: the real il3820.EPD driver runs against recording
+# pins/SPI, and the byte stream is decoded into a model of the controller
+# RAM (window, cursor, data entry mode 0x03) that can be saved as a PNG.
+# The controller has two RAM banks that swap on every refresh (0x20);
+# writes go to the current bank, `ram`.
+import host
+
+host.install()
+
+import il3820  # noqa: E402
+
+WIDTH = il3820.EPD_WIDTH
+HEIGHT = il3820.EPD_HEIGHT
+ROW_BYTES = WIDTH // 8
+
+CMD_NAMES = {
+    0x01: "DRIVER_OUTPUT",
+    0x11: "DATA_ENTRY",
+    0x12: "SWRESET",
+    0x18: "TEMP_SENSOR",
+    0x20: "MASTER_ACTIVATION",
+    0x21: "UPDATE_CONTROL_1",
+    0x22: "UPDATE_CONTROL_2",
+    0x24: "WRITE_RAM",
+    0x32: "WRITE_LUT",
+    0x3C: "BORDER",
+    0x44: "RAM_X_RANGE",
+    0x45: "RAM_Y_RANGE",
+    0x4E: "RAM_X_COUNTER",
+    0x4F: "RAM_Y_COUNTER",
+}
+
+
+class Stats:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.command_bytes = 0
+        self.data_bytes = 0
+        self.ram_bytes = 0
+        self.spi_writes = 0
+        self.cs_toggles = 0
+        self.dc_toggles = 0
+        self.refreshes = 0
+        self.commands = {}
+
+    @property
+    def total_bytes(self):
+        return self.command_bytes + self.data_bytes
+
+    def summary(self):
+        return (f"{self.total_bytes} SPI bytes ({self.ram_bytes} RAM, "
+                f"{self.command_bytes} cmd, {self.data_bytes - self.ram_bytes} args), "
+                f"{self.spi_writes} writes, {self.cs_toggles} CS / {self.dc_toggles} DC toggles, "
+                f"{self.refreshes} refreshes")
+
+
+class Panel:
+    def __init__(self):
+        self.banks = [bytearray(b"\xff" * (ROW_BYTES * HEIGHT)) for _ in range(2)]
+        self.bank = 0
+        self.stats = Stats()
+        self.log = []
+        self.command = None
+        self.args = bytearray()
+        self.x_start, self.x_end = 0, ROW_BYTES - 1
+        self.y_start, self.y_end = 0, HEIGHT - 1
+        self.x = 0
+        self.y = 0
+        self.dc = 0
+
+    def on_command(self, cmd):
+        self._finish()
+        self.command = cmd
+        self.args = bytearray()
+        self.stats.command_bytes += 1
+        self.stats.commands[cmd] = self.stats.commands.get(cmd, 0) + 1
+        if cmd == 0x20:
+            self.stats.refreshes += 1
+            self.bank ^= 1
+
+    @property
+    def ram(self):
+        return self.banks[self.bank]
+
+    def on_data(self, data):
+        self.stats.data_bytes += len(data)
+        if self.command == 0x24:
+            self.stats.ram_bytes += len(data)
+            for b in data:
+                self._write_ram(b)
+        else:
+            self.args.extend(data)
+
+    def _finish(self):
+        # Apply the argument bytes of the previous command
+        cmd, a = self.command, self.args
+        if cmd is None:
+            return
+        self.log.append((cmd, bytes(a)))
+        if cmd == 0x44 and len(a) >= 2:
+            self.x_start, self.x_end = a[0], a[1]
+        elif cmd == 0x45 and len(a) >= 4:
+            self.y_start = a[0] | (a[1] << 8)
+            self.y_end = a[2] | (a[3] << 8)
+        elif cmd == 0x4E and len(a) >= 1:
+            self.x = a[0]
+        elif cmd == 0x4F and len(a) >= 2:
+            self.y = a[0] | (a[1] << 8)
+
+    def _write_ram(self, b):
+        if 0 <= self.x < ROW_BYTES and 0 <= self.y < HEIGHT:
+            self.ram[self.y * ROW_BYTES + self.x] = b
+        # Data entry mode 0x03: X increments, then Y
+        self.x += 1
+        if self.x > self.x_end:
+            self.x = self.x_start
+            self.y += 1
+            if self.y > self.y_end:
+                self.y = self.y_start
+
+    def flush(self):
+        self._finish()
+        self.command = None
+
+    def to_image(self, scale=1):
+        from PIL import Image
+        self.flush()
+        img = Image.frombytes("1", (WIDTH, HEIGHT), bytes(self.ram))
+        if scale != 1:
+            img = img.resize((WIDTH * scale, HEIGHT * scale), Image.NEAREST)
+        return img
+
+    def save_png(self, path, scale=1):
+        self.to_image(scale).save(path)
+
+
+class SimPin(host.Pin):
+    def __init__(self, panel=None, role=None):
+        super().__init__()
+        self.panel = panel
+        self.role = role
+
+    def value(self, v=None):
+        if v is None:
+            return self._value
+        if self.panel and v != self._value:
+            if self.role == "cs":
+                self.panel.stats.cs_toggles += 1
+            elif self.role == "dc":
+                self.panel.stats.dc_toggles += 1
+        self._value = v
+
+
+class RecordingSPI:
+    def __init__(self, panel, dc):
+        self.panel = panel
+        self.dc = dc
+
+    def write(self, buf):
+        data = bytes(buf)
+        self.panel.stats.spi_writes += 1
+        if self.dc.value():
+            self.panel.on_data(data)
+        else:
+            for cmd in data:
+                self.panel.on_command(cmd)
+
+
+class SimEPD(il3820.EPD):
+    def __init__(self):
+        self.panel = Panel()
+        dc = SimPin(self.panel, "dc")
+        super().__init__(RecordingSPI(self.panel, dc), SimPin(self.panel, "cs"), dc,
+                         SimPin(self.panel, "busy"), rst=None)
+
+    @property
+    def stats(self):
+        return self.panel.stats
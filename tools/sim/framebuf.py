@@ -0,0 +1,141 @@
+# CPython stand-in for MicroPython's framebuf module.
+#
+# Only MONO_HLSB (the format the display code uses) is implemented. Pixel
+# addressing, clipping and blit key handling follow modframebuf.c, so frames
+# are byte-identical to the device except for text(): the device ROM font
+# isn't available here, so glyphs come from Pillow's built-in bitmap font
+# squeezed into the same 8x8 cells.
+
+MONO_VLSB = 0
+MONO_HLSB = 3
+MONO_HMSB = 4
+
+_font = None
+
+
+def _font_columns(ch):
+    # 8 column bytes (bit 0 = top row), like font_petme128_8x8
+    global _font
+    if _font is None:
+        from PIL import Image, ImageDraw, ImageFont
+        pil_font = ImageFont.load_default_imagefont()
+        _font = {}
+        for code in range(32, 128):
+            img = Image.new("1", (8, 8), 0)
+            ImageDraw.Draw(img).text((1, -1), chr(code), font=pil_font, fill=1)
+            px = img.load()
+            _font[code] = bytes(
+                sum(1 << y for y in range(8) if px[x, y]) for x in range(8)
+            )
+    code = ord(ch)
+    if code < 32 or code > 127:
+        code = 127
+    return _font[code]
+
+
+class FrameBuffer:
+    def __init__(self, buffer, width, height, format, stride=None):
+        if format != MONO_HLSB:
+            raise ValueError("only MONO_HLSB is supported")
+        self.buf = memoryview(buffer).cast("B")
+        self.width = width
+        self.height = height
+        self.format = format
+        if stride is None:
+            stride = width
+        self.stride = (stride + 7) & ~7
+
+    def _set(self, x, y, c):
+        index = (x + y * self.stride) >> 3
+        offset = 7 - (x & 7)
+        b = self.buf[index]
+        self.buf[index] = (b & ~(1 << offset)) | ((c != 0) << offset)
+
+    def _get(self, x, y):
+        index = (x + y * self.stride) >> 3
+        return (self.buf[index] >> (7 - (x & 7))) & 1
+
+    def fill(self, c):
+        self.buf[:] = (b"\xff" if c else b"\x00") * len(self.buf)
+
+    def fill_rect(self, x, y, w, h, c):
+        if w < 1 or h < 1 or x + w <= 0 or y + h <= 0 or y >= self.height or x >= self.width:
+            return
+        xend = min(self.width, x + w)
+        yend = min(self.height, y + h)
+        x = max(x, 0)
+        y = max(y, 0)
+        for yy in range(y, yend):
+            for xx in range(x, xend):
+                self._set(xx, yy, c)
+
+    def pixel(self, x, y, c=None):
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return None
+        if c is None:
+            return self._get(x, y)
+        self._set(x, y, c)
+
+    def hline(self, x, y, w, c):
+        self.fill_rect(x, y, w, 1, c)
+
+    def vline(self, x, y, h, c):
+        self.fill_rect(x, y, 1, h, c)
+
+    def rect(self, x, y, w, h, c, f=False):
+        if f:
+            self.fill_rect(x, y, w, h, c)
+            return
+        self.fill_rect(x, y, w, 1, c)
+        self.fill_rect(x, y + h - 1, w, 1, c)
+        self.fill_rect(x, y, 1, h, c)
+        self.fill_rect(x + w - 1, y, 1, h, c)
+
+    def line(self, x1, y1, x2, y2, c):
+        dx = abs(x2 - x1)
+        dy = -abs(y2 - y1)
+        sx = 1 if x1 < x2 else -1
+        sy = 1 if y1 < y2 else -1
+        err = dx + dy
+        while True:
+            self.pixel(x1, y1, c)
+            if x1 == x2 and y1 == y2:
+                break
+            e2 = 2 * err
+            if e2 >= dy:
+                err += dy
+                x1 += sx
+            if e2 <= dx:
+                err += dx
+                y1 += sy
+
+    def text(self, s, x0, y0, c=1):
+        for ch in s:
+            for j, col in enumerate(_font_columns(ch)):
+                x = x0 + j
+                if 0 <= x < self.width:
+                    y = y0
+                    while col:
+                        if col & 1 and 0 <= y < self.height:
+                            self._set(x, y, c)
+                        col >>= 1
+                        y += 1
+            x0 += 8
+
+    def blit(self, fbuf, x, y, key=-1, palette=None):
+        if palette is not None:
+            raise NotImplementedError("palette blits are not simulated")
+        if x >= self.width or y >= self.height or -x >= fbuf.width or -y >= fbuf.height:
+            return
+        x0 = max(0, x)
+        y0 = max(0, y)
+        x0end = min(self.width, x + fbuf.width)
+        y0end = min(self.height, y + fbuf.height)
+        for cy in range(y0, y0end):
+            for cx in range(x0, x0end):
+                col = fbuf._get(cx - x, cy - y)
+                if col != key:
+                    self._set(cx, cy, col)
+
+    def scroll(self, xstep, ystep):
+        raise NotImplementedError("scroll is not simulated")
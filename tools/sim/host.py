@@ -0,0 +1,189 @@
+# Makes the device modules importable under CPython for simulation and
+# benchmarks. install() puts the repo root and this directory (for the
+# framebuf shim) on sys.path, aliases the u-prefixed MicroPython modules to
+# their CPython equivalents and registers inert hardware modules.
+import asyncio
+import binascii
+import gc
+import json
+import os
+import socket
+import struct
+import sys
+import time
+import types
+
+SIM_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(os.path.dirname(SIM_DIR))
+
+_installed = False
+
+
+class Pin:
+    IN = 0
+    OUT = 1
+    PULL_UP = 2
+
+    def __init__(self, id=None, mode=None, value=0, **kwargs):
+        self.id = id
+        self._value = value
+
+    def init(self, mode=None, value=None, **kwargs):
+        if value is not None:
+            self._value = value
+
+    def value(self, v=None):
+        if v is None:
+            return self._value
+        self._value = v
+
+    def __call__(self, v=None):
+        return self.value(v)
+
+
+class SPI:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def write(self, buf):
+        pass
+
+
+class NeoPixel:
+    def __init__(self, pin, n):
+        self.n = n
+        self._pixels = [(0, 0, 0)] * n
+
+    def __setitem__(self, i, color):
+        self._pixels[i] = color
+
+    def __getitem__(self, i):
+        return self._pixels[i]
+
+    def fill(self, color):
+        self._pixels = [color] * self.n
+
+    def write(self):
+        pass
+
+
+class WLAN:
+    def __init__(self, interface=0):
+        self._active = False
+
+    def active(self, state=None):
+        if state is None:
+            return self._active
+        self._active = state
+
+    def isconnected(self):
+        return False
+
+    def ifconfig(self):
+        return ("0.0.0.0", "0.0.0.0", "0.0.0.0", "0.0.0.0")
+
+    def config(self, *args, **kwargs):
+        pass
+
+    def connect(self, *args):
+        pass
+
+    def scan(self):
+        return []
+
+
+_t0 = time.perf_counter()
+
+
+def _ticks_us():
+    return int((time.perf_counter() - _t0) * 1_000_000)
+
+
+def _ticks_ms():
+    return int((time.perf_counter() - _t0) * 1000)
+
+
+def _module(name, **attrs):
+    mod = types.ModuleType(name)
+    mod.__dict__.update(attrs)
+    return mod
+
+
+def _install_font(sim_font=False):
+    # Prefer a real compiled font (python compile_font.py in the repo root)
+    # unless sim_font is set; otherwise draw CJK characters as outlined
+    # 16x16 boxes.
+    if not sim_font:
+        try:
+            import font_zh  # noqa: F401
+            return
+        except ImportError:
+            pass
+
+    def draw_text(fb, text, x, y):
+        cursor = x
+        for char in text:
+            if 32 <= ord(char) <= 126:
+                fb.text(char, cursor, y + 4, 0)
+                cursor += 8
+            else:
+                fb.rect(cursor + 1, y + 1, 14, 14, 0)
+                cursor += 16
+
+    def draw_char(fb, char, x, y):
+        draw_text(fb, char, x, y)
+
+    sys.modules["font_zh"] = _module("font_zh", draw_text=draw_text, draw_char=draw_char)
+
+
+def install(sim_font=False):
+    # sim_font=True always uses the box glyphs, so renders do not depend on
+    # whether font_zh.py has been compiled locally (golden images)
+    global _installed
+    if _installed:
+        return
+    _installed = True
+
+    for path in (SIM_DIR, REPO_ROOT):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+
+    time.sleep_ms = lambda ms: None
+    time.sleep_us = lambda us: None
+    time.ticks_us = _ticks_us
+    time.ticks_ms = _ticks_ms
+    time.ticks_diff = lambda a, b: a - b
+    time.ticks_add = lambda a, b: a + b
+    gc.mem_free = lambda: 100 * 1024
+    gc.mem_alloc = lambda: 0
+
+    if not hasattr(asyncio, "sleep_ms"):
+        asyncio.sleep_ms = lambda ms: asyncio.sleep(ms / 1000)
+    if not hasattr(asyncio, "wait_for_ms"):
+        asyncio.wait_for_ms = lambda aw, ms: asyncio.wait_for(aw, ms / 1000)
+    if not hasattr(asyncio.StreamReader, "readinto"):
+        async def readinto(self, buf):
+            data = await self.read(len(buf))
+            buf[:len(data)] = data
+            return len(data)
+        asyncio.StreamReader.readinto = readinto
+
+    aliases = {
+        "uasyncio": asyncio,
+        "ubinascii": binascii,
+        "ujson": json,
+        "uos": os,
+        "usocket": socket,
+        "ustruct": struct,
+        "utime": time,
+    }
+    for name, mod in aliases.items():
+        sys.modules.setdefault(name, mod)
+
+    sys.modules.setdefault("machine", _module(
+        "machine", Pin=Pin, SPI=SPI, reset=lambda: None, freq=lambda *a: 160_000_000))
+    sys.modules.setdefault("neopixel", _module("neopixel", NeoPixel=NeoPixel))
+    sys.modules.setdefault("network", _module(
+        "network", WLAN=WLAN, STA_IF=0, AP_IF=1, AUTH_OPEN=0))
+
+    _install_font(sim_font)
@@ -1,6 +1,9 @@
 import ustruct
 import uos
 
+# Stored entries are copied in chunks of this size
+CHUNK_SIZE = 1024
+
 def extract(zip_path, dest_dir):
     with open(zip_path, 'rb') as f:
         while True:
@@ -33,13 +36,22 @@ def extract(zip_path, dest_dir):
                 except: pass
                 continue
                 
+            if method == 0:
+                # Store (No compression): copy in chunks
+                with open(out_path, 'wb') as out_f:
+                    remaining = comp_size
+                    while remaining > 0:
+                        chunk = f.read(min(CHUNK_SIZE, remaining))
+                        if not chunk:
+                            break
+                        out_f.write(chunk)
+                        remaining -= len(chunk)
+                continue
+
             # Read Data
             data = f.read(comp_size)
             
-            if method == 0:
-                # Store (No compression)
-                pass
-            elif method == 8:
+            if method == 8:
                 # Deflate
                 try:
                     import uzlib
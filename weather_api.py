@@ -1,7 +1,8 @@
-import usocket
-import ujson
+import json_pick
+import http_client
 import time
 import config
+import events
 
 # Global Cache
 cache = {
@@ -11,33 +12,12 @@ cache = {
     "last_update": 0
 }
 
-def http_get(url):
-    try:
-        _, _, host, path = url.split("/", 3)
-        if not path:
-            path = ""
-
-        addr = usocket.getaddrinfo(host, 80)[0][-1]
-        s = usocket.socket(usocket.AF_INET, usocket.SOCK_STREAM)
-        s.settimeout(10)
-        s.connect(addr)
-
-        request = f"GET /{path} HTTP/1.0\r\nHost: {host}\r\nUser-Agent: ESP8266\r\n\r\n"
-        s.write(request.encode())
-
-        response = b""
-        while True:
-            data = s.read(1024)
-            if not data:
-                break
-            response += data
-        s.close()
-
-        headers, body = response.split(b"\r\n\r\n", 1)
-        return body.decode("utf-8")
-    except Exception as e:
-        print(f"HTTP Error: {e}")
-        return None
+# Open-Meteo fields kept from the response; everything else is skipped
+WEATHER_FIELDS = {
+    "current_weather": ("temperature", "weathercode"),
+    "daily": ("time", "temperature_2m_max", "temperature_2m_min"),
+}
+FORECAST_DAYS = 3
 
 def get_weather_desc(code):
     # WMO Codes to Chinese
@@ -51,7 +31,7 @@ def get_weather_desc(code):
     if code in [95, 96, 99]: return "雨"
     return "阴" # Default
 
-def update():
+async def update():
     # Only update if 15 minutes have passed
     now = time.time()
     if now - cache["last_update"] < 900:  # 15 mins
@@ -61,10 +41,13 @@ def update():
     # Add daily forecast and timezone
     url = f"http://api.open-meteo.com/v1/forecast?latitude={config.LAT}&longitude={config.LON}&current_weather=true&daily=temperature_2m_max,temperature_2m_min&timezone=auto"
 
-    json_str = http_get(url)
-    if json_str:
+    picker = json_pick.Picker(WEATHER_FIELDS, FORECAST_DAYS)
+    status = await http_client.get(url, picker.feed, conditional=True)
+    if status == 304:
+        cache["last_update"] = now # Unchanged upstream
+    elif status == 200:
         try:
-            data = ujson.loads(json_str)
+            data = picker.result
             
             # 1. Current
             curr = data.get("current_weather", {})
@@ -80,12 +63,13 @@ def update():
             
             cache["forecast"] = []
             # Get up to 3 days
-            for i in range(min(3, len(times))):
+            for i in range(min(FORECAST_DAYS, len(times), len(maxs), len(mins))):
                 d_str = times[i][5:] 
                 t_max = maxs[i]
                 t_min = mins[i]
                 cache["forecast"].append((d_str, t_max, t_min))
                 
             cache["last_update"] = now
+            events.publish("weather")
         except Exception as e:
             print(f"Weather Parse Error: {e}")
@@ -5,20 +5,30 @@ import wifi_manager
 import led_manager
 import machine
 import auth_manager
+import session_manager
+import image_store
+import display_metrics
+import events
+import weather_api
 import ubinascii
 import logger
 import time
+import uasyncio
 
-# Increase Body Limit for OTA
-Request.max_content_length = 1024 * 1024
-Request.max_body_length = 1024 * 1024
+# Accept large OTA packages, but only buffer small bodies in RAM. Anything
+# bigger than max_body_length is left for the handler to read from
+# request.stream.
+Request.max_content_length = 4 * 1024 * 1024
+Request.max_body_length = 16 * 1024
 
 app = Microdot()
 
-sessions = set()
-
 def get_token(request):
-    return request.headers.get("X-Token")
+    token = request.headers.get("X-Token")
+    if token is None and request.path == '/api/events':
+        # EventSource cannot send headers
+        token = request.args.get("token")
+    return token
 
 @app.before_request
 async def check_auth(request):
@@ -31,16 +41,59 @@ async def check_auth(request):
     
     # Check Token
     token = get_token(request)
-    if not token or token not in sessions:
+    if not token or not session_manager.validate(token):
         return {'error': 'unauthorized'}, 401
 
+LOG_FORMATS = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+    'text': 'text/plain; charset=utf-8',
+}
+
+def parse_log_line(n, line):
+    # "[HH:MM:SS] LEVEL: message"
+    sep = line.find(': ', 11)
+    if line[:1] == '[' and line[9:11] == '] ' and sep > 0:
+        return {'n': n, 'time': line[1:9], 'level': line[11:sep], 'msg': line[sep + 2:].rstrip('\n')}
+    return {'n': n, 'msg': line.rstrip('\n')}
+
+def stream_logs(lines, fmt):
+    # One line in memory at a time, whatever the log size. A plain
+    # generator: Microdot streams these on MicroPython and CPython alike.
+    if fmt == 'text':
+        for _, line in lines:
+            yield line
+    elif fmt == 'ndjson':
+        for n, line in lines:
+            yield ujson.dumps(parse_log_line(n, line)) + '\n'
+    else:
+        # Same shape as before: {"logs": "<all lines>"}
+        yield '{"logs": "'
+        for _, line in lines:
+            yield ujson.dumps(line)[1:-1]
+        yield '"}'
+
 @app.route('/api/logs', methods=['GET', 'DELETE'])
 async def api_logs(request):
     if request.method == 'DELETE':
         logger.clear()
         return {'status': 'cleared'}
-    else:
-        return {'logs': logger.get_logs()}
+    args = request.args
+    fmt = args.get('format', 'json')
+    if fmt not in LOG_FORMATS:
+        return {'error': 'format must be json, ndjson or text'}, 400
+    try:
+        offset = int(args.get('offset', 0))
+        limit = int(args.get('limit', -1))
+        tail = int(args.get('tail', 0))
+    except ValueError:
+        return {'error': 'offset, limit and tail must be integers'}, 400
+    lines = logger.select(offset, limit, tail, args.get('since'))
+    return stream_logs(lines, fmt), 200, {'Content-Type': LOG_FORMATS[fmt]}
+
+@app.route('/api/metrics/display')
+async def api_metrics_display(request):
+    return display_metrics.snapshot()
 
 @app.route('/api/auth/status')
 async def auth_status(request):
@@ -67,18 +120,23 @@ async def auth_login(request):
     data = request.json
     password = data.get("password")
     if auth_manager.verify_password(password):
-        # Generate simple token (random hex)
-        token = ubinascii.hexlify(os.urandom(16)).decode()
-        sessions.add(token)
-        return {'token': token}
+        return {'token': session_manager.create()}
     else:
         return {'error': 'invalid password'}, 401
 
+@app.route('/api/auth/logout', methods=['POST'])
+async def auth_logout(request):
+    token = get_token(request)
+    if token and session_manager.revoke(token):
+        return {'status': 'ok'}
+    return {'error': 'unknown session'}, 401
+
 @app.route('/api/auth/reset', methods=['POST'])
 async def auth_reset(request):
     data = request.json
     serial = data.get("serial")
     if auth_manager.factory_reset(serial):
+        session_manager.clear()
         return {'status': 'reset'}
     else:
         return {'error': 'invalid serial'}, 403
@@ -108,18 +166,96 @@ async def api_ota_key(request):
     except Exception as e:
         return {'error': str(e)}, 500
 
+# --- Live State ---
+
+# Filesystem usage, refreshed by storage_watch_task rather than per request
+STORAGE_POLL_S = 60
+storage = {"storage_free": 0, "storage_total": 0}
+
+def set_message(message):
+    global custom_message
+    if message != custom_message:
+        custom_message = message
+        events.publish("message")
+
+def led_state():
+    return {
+        "led": led_manager.ENABLED,
+        "brightness": led_manager.GLOBAL_BRIGHTNESS,
+        "mode": led_manager.CURRENT_MODE,
+        "colors": led_manager.MANUAL_COLORS,
+    }
+
+def refresh_storage():
+    try:
+        s = os.statvfs('/')
+    except OSError:
+        return
+    free = s[0] * s[3]
+    total = s[0] * s[2]
+    if free != storage["storage_free"] or total != storage["storage_total"]:
+        storage["storage_free"] = free
+        storage["storage_total"] = total
+        events.publish("storage")
+
+async def storage_watch_task():
+    while True:
+        refresh_storage()
+        await uasyncio.sleep(STORAGE_POLL_S)
+
+def event_payload(topic):
+    if topic == "message":
+        return {"message": custom_message}
+    if topic == "led":
+        return led_state()
+    if topic == "weather":
+        return weather_api.cache
+    return storage
+
+# Seconds between keep-alive comments; also how often the session is rechecked
+EVENTS_KEEPALIVE_S = 20
+
+class EventStream:
+    # Server-Sent Events body: every topic once on connect, then only the
+    # topics that changed. An __anext__ class rather than an async
+    # generator, which MicroPython lacks (as in microdot/sse.py).
+    def __init__(self, token):
+        self.token = token
+        self.seen = {}
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while True:
+            for topic in events.TOPICS:
+                v = events.version(topic)
+                if self.seen.get(topic) != v:
+                    self.seen[topic] = v
+                    return f"event: {topic}\ndata: {ujson.dumps(event_payload(topic))}\n\n"
+            if not await events.wait(EVENTS_KEEPALIVE_S * 1000):
+                if not session_manager.validate(self.token):
+                    raise StopAsyncIteration
+                return ": ping\n\n"
+
+@app.route('/api/events')
+async def api_events(request):
+    return EventStream(get_token(request)), 200, {
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache',
+    }
+
 # --- Existing API ---
 
 @app.route('/api/message', methods=['GET', 'POST'])
 async def api_message(request):
-    global custom_message
     if request.method == 'POST':
         try:
             data = request.json
             if data is None:
                 return {'error': 'no json received'}, 400
                 
-            custom_message = data.get("message", "")
+            set_message(data.get("message", ""))
             print(f"Set Message to: '{custom_message}'")
             return {'status': 'ok'}
         except Exception as e:
@@ -149,35 +285,81 @@ async def api_settings(request):
         except Exception as e:
             return {'error': str(e)}, 400
     else:
-        s = os.statvfs('/')
-        return {
-            "led": led_manager.ENABLED,
-            "brightness": led_manager.GLOBAL_BRIGHTNESS,
-            "mode": led_manager.CURRENT_MODE,
-            "colors": led_manager.MANUAL_COLORS,
-            "storage_free": s[0] * s[3],
-            "storage_total": s[0] * s[2]
-        }
+        state = led_state()
+        state.update(storage)
+        return state
 
 @app.route('/api/display/image', methods=['POST'])
 async def api_display_image(request):
-    global custom_message
+    # Body: raw 4736-byte frame, or PackBits data with ?format=rle
+    # Query: slot=<name> (default "default"), show=0 to store only
     try:
-        data = request.body
-        if len(data) != 4736:
-            return {'error': f'Invalid size: {len(data)}, expected 4736'}, 400
-            
-        with open('image.bin', 'wb') as f:
-            f.write(data)
-            
-        custom_message = "__IMAGE__"
-        print("Image Received and Saved")
-        return {'status': 'ok'}
+        slot = request.args.get('slot', image_store.DEFAULT_SLOT)
+        encoded = request.args.get('format') == 'rle'
+        size = image_store.save(slot, request.body, encoded)
+        refresh_storage()
         
+        if request.args.get('show', '1') != '0':
+            set_message(image_store.message_for(slot))
+        print(f"Image Received and Saved to '{slot}' ({size} bytes)")
+        return {'status': 'ok', 'slot': slot, 'stored': size}
+        
+    except ValueError as e:
+        return {'error': str(e)}, 400
     except Exception as e:
         print(f"Image Upload Error: {e}")
         return {'error': str(e)}, 500
 
+@app.route('/api/images', methods=['GET'])
+async def api_images(request):
+    return {
+        'slots': image_store.list_slots(),
+        'active': image_store.slot_from_message(custom_message)
+    }
+
+@app.route('/api/images/select', methods=['POST'])
+async def api_images_select(request):
+    data = request.json
+    if data is None:
+        return {'error': 'no json'}, 400
+    slot = data.get("slot", image_store.DEFAULT_SLOT)
+    if not image_store.exists(slot):
+        return {'error': 'no such slot'}, 404
+    set_message(image_store.message_for(slot))
+    return {'status': 'ok', 'slot': slot}
+
+@app.route('/api/images/<name>', methods=['DELETE'])
+async def api_images_delete(request, name):
+    if not image_store.delete(name):
+        return {'error': 'not found'}, 404
+    if image_store.slot_from_message(custom_message) == name:
+        set_message("")
+    refresh_storage()
+    return {'status': 'deleted'}
+
+@app.route('/api/led/frame', methods=['POST'])
+async def api_led_frame(request):
+    # Raw RGB bytes for every LED, NUM_LEDS * 3 per frame. Several frames
+    # play back every ?ms= milliseconds (?repeat=0 loops). Not saved; status
+    # colours stay off the LEDs until HOST_HOLD_MS after the last frame.
+    data = request.body
+    size = led_manager.FRAME_BYTES
+    if not data or len(data) % size:
+        return {'error': f'expected a multiple of {size} bytes'}, 400
+    count = len(data) // size
+    if count > led_manager.MAX_FRAMES:
+        return {'error': f'at most {led_manager.MAX_FRAMES} frames'}, 413
+    if count == 1:
+        led_manager.hold_frame(data)
+    else:
+        try:
+            ms = int(request.args.get('ms', 50))
+            repeat = int(request.args.get('repeat', 1))
+        except ValueError:
+            return {'error': 'invalid ms or repeat'}, 400
+        led_manager.play_frames(data, ms, repeat)
+    return {'frames': count}
+
 @app.route('/api/wifi', methods=['POST'])
 async def api_wifi(request):
     try:
@@ -206,14 +388,17 @@ async def api_ota(request):
         sig_hex = request.headers.get('X-Signature')
         if not sig_hex:
             return {'error': 'missing signature'}, 400
+        if not request.content_length:
+            return {'error': 'missing body'}, 400
             
         signature = ubinascii.unhexlify(sig_hex)
-        zip_data = request.body
         
-        if ota_manager.verify_and_install(zip_data, signature):
-            return {'status': 'updating'}
-        else:
+        # Streamed to flash in chunks, never held in RAM
+        if not await ota_manager.receive_update(request.stream, request.content_length, signature):
             return {'error': 'invalid signature'}, 403
+        if not ota_manager.install():
+            return {'error': 'install failed'}, 500
+        return {'status': 'updating'}
             
     except Exception as e:
         print(f"OTA Error: {e}")
@@ -221,25 +406,59 @@ async def api_ota(request):
 
 @app.route('/api/scan')
 async def api_scan(request):
-    try:
-        networks = wifi_manager.scan_networks()
-        return ujson.dumps(networks), 200, {'Content-Type': 'application/json'}
-    except Exception as e:
-        return {'error': str(e)}, 500
+    # Cached results, immediately; ?refresh=1 queues a new scan, and the
+    # client polls until "scanning" is false
+    refresh = request.args.get('refresh') == '1'
+    return wifi_manager.scan_results(refresh)
 
 # --- Static File Serving ---
 
+# Written by tools/precompress.py: {path: {"etag": ..., "gz": true}}
+STATIC_MANIFEST = 'www/etags.json'
+# Vite puts a content hash in every /assets/ name, so they never change
+ASSET_CACHE = 'public, max-age=31536000, immutable'
+
+_static_manifest = None
+
+def static_manifest():
+    global _static_manifest
+    if _static_manifest is None:
+        try:
+            with open(STATIC_MANIFEST, 'r') as f:
+                _static_manifest = ujson.load(f)
+        except (OSError, ValueError):
+            _static_manifest = {} # Plain build; serve files uncompressed
+    return _static_manifest
+
+def serve_static(request, path, immutable=False):
+    # path is relative to www/. Raises OSError if the file is missing.
+    cache = ASSET_CACHE if immutable else 'no-cache'
+    info = static_manifest().get(path)
+    etag = None
+    if info:
+        etag = '"' + info['etag'] + '"'
+        if etag in request.headers.get('If-None-Match', ''):
+            return '', 304, {'ETag': etag, 'Cache-Control': cache}
+    gz = bool(info and info.get('gz') and 'gzip' in request.headers.get('Accept-Encoding', ''))
+    res = send_file('www/' + path, compressed=gz, file_extension='.gz' if gz else '')
+    res.headers['Cache-Control'] = cache
+    if etag:
+        res.headers['ETag'] = etag
+    if info and info.get('gz'):
+        res.headers['Vary'] = 'Accept-Encoding'
+    return res
+
 @app.route('/')
 async def index(request):
-    return send_file('www/index.html')
+    return serve_static(request, 'index.html')
 
 @app.route('/setup')
 async def setup_page(request):
-    return send_file('www/index.html') 
+    return serve_static(request, 'index.html')
 
 @app.route('/assets/<path:path>')
 async def static_assets(request, path):
-    return send_file('www/assets/' + path)
+    return serve_static(request, 'assets/' + path, immutable=True)
 
 @app.route('/<path:path>')
 async def static_root(request, path):
@@ -251,16 +470,17 @@ async def static_root(request, path):
         
     try:
         # Try to serve file
-        return send_file('www/' + path)
+        return serve_static(request, path)
     except:
         # If 404, just serve index? Or let it 404?
         # For SPA (Vue Router), we usually serve index.html.
         # Let's serve index.html if file missing
-        return send_file('www/index.html')
+        return serve_static(request, 'index.html')
 
 # Global State
 custom_message = ""
 
 async def start_server():
     print("Starting Microdot Server...")
+    uasyncio.create_task(storage_watch_task())
     await app.start_server(host='0.0.0.0', port=80, debug=True)
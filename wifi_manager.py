@@ -1,26 +1,27 @@
 import network
 import led_manager
 import time
-import ujson
-import os
+import uasyncio
+import config_store
 
 # Global State
 ip_address = "0.0.0.0"
 is_ap_mode = False
 
-CONFIG_FILE = "wifi.json"
+# Scan results, refreshed by scan_task. sta.scan() blocks for a few
+# seconds, so it only ever runs there, one scan at a time, and requests
+# get whatever is cached.
+SCAN_TTL_MS = 60 * 1000 # Older results are refreshed when read
+SCAN_DELAY_MS = 300 # Lets the reply that asked for a scan go out first
+scan_cache = {"networks": [], "updated": None, "scanning": False}
+_scan_wanted = uasyncio.Event()
 
 def load_config():
-    try:
-        with open(CONFIG_FILE, "r") as f:
-            return ujson.load(f)
-    except:
-        return None
+    return config_store.get("wifi")
 
 def save_config(ssid, password):
-    data = {"ssid": ssid, "password": password}
-    with open(CONFIG_FILE, "w") as f:
-        ujson.dump(data, f)
+    # Written straight away; the caller reboots next
+    config_store.put("wifi", {"ssid": ssid, "password": password}, flush=True)
     print("WiFi Config Saved")
 
 def scan_networks():
@@ -50,6 +51,41 @@ def scan_networks():
     result.sort(key=lambda x: x["rssi"], reverse=True)
     return result
 
+def scan_age_ms():
+    # Milliseconds since the last scan finished, or None before the first
+    if scan_cache["updated"] is None:
+        return None
+    return time.ticks_diff(time.ticks_ms(), scan_cache["updated"])  # type: ignore
+
+def request_scan():
+    # Coalesced: any number of requests before the task runs make one scan
+    _scan_wanted.set()
+
+def scan_results(refresh=False):
+    # Returns the cached results at once, queueing a scan if asked to or stale
+    age = scan_age_ms()
+    if refresh or age is None or age >= SCAN_TTL_MS:
+        request_scan()
+    return {
+        "networks": scan_cache["networks"],
+        "age_ms": age,
+        "scanning": scan_cache["scanning"] or _scan_wanted.is_set(),
+    }
+
+async def scan_task():
+    while True:
+        await _scan_wanted.wait()
+        await uasyncio.sleep_ms(SCAN_DELAY_MS)
+        _scan_wanted.clear()
+        scan_cache["scanning"] = True
+        networks = scan_networks()
+        # A failed scan keeps the previous list but still counts as fresh,
+        # so clients polling a broken radio do not rescan back to back
+        if networks:
+            scan_cache["networks"] = networks
+        scan_cache["updated"] = time.ticks_ms()  # type: ignore
+        scan_cache["scanning"] = False
+
 def start_ap():
     global ip_address, is_ap_mode
     print("Starting AP Mode...")
@@ -68,11 +104,11 @@ def start_ap():
         
     ip_address = ap.ifconfig()[0]
     print(f"AP Started. Connect to 'InkFrame-Setup'. IP: {ip_address}")
+    request_scan() # Warm the list for the setup page
     
-    led_manager.breathe(255, 0, 255, cycles=3, speed=0.02)
-    led_manager.set_led(50, 0, 50)
+    led_manager.breathe(255, 0, 255, cycles=3, speed=0.02, hold=(50, 0, 50))
 
-def connect():
+async def connect():
     global ip_address, is_ap_mode
     
     # 1. Try to load config
@@ -100,10 +136,11 @@ def connect():
         wlan.connect(ssid, password)
 
         # Wait up to 20 seconds
+        led_manager.led_wifi_wait()
         for _ in range(20):
             if wlan.isconnected():
                 break
-            led_manager.led_wifi_wait()
+            await uasyncio.sleep_ms(1000)
             print(".")
 
     if wlan.isconnected():